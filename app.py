@@ -1,17 +1,37 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
+import asyncio
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
-import re
 import time
 import random
 import hashlib
 import uuid
+import zipfile
 from pathlib import Path
 from collections import defaultdict
 
+from utils.extraction_cache import ExtractionCache
+from utils.extraction_worker import ExtractionError, extract_document, run_isolated_extraction
+from utils.extractors import extractor_kind, is_isolated, supported_suffixes
+from utils.upload_ingest import ArchiveMember, ingest_upload, list_archive_members
+from utils.document import Document, as_document
+from utils.thai_tokenizer import build_course_tokenizer
+from utils.course_model import compile_program_model
+from utils.batch_scoring import propagate_plos, propagate_ylos
+from utils.slide_alignment import build_slide_alignment
+from utils.bm25_index import build_program_index
+from utils.semantic_model import load_or_fit_semantic_model
+from utils.incremental_text import IncrementalTextAnalyzer
+from utils.compact_results import compact_assessment, expand_assessment
+from utils.stable_hash import stable_digest, stable_seed
+from utils.llm_cache import LLMResponseCache
+from utils.llm_chunking import chunk_sections, estimate_tokens, reduce_chunk_analyses
+from utils.usage_ledger import UsageLedger, UsageRecord, estimate_cost
+
 # Course Descriptions with 4 CLOs each
 COURSE_DESCRIPTIONS = {
     '282711': {
@@ -257,142 +277,206 @@ OPENAI_MODELS = {
 
 # Default model - change this to your preferred model
 DEFAULT_MODEL = "gpt-3.5-turbo"
+AI_MAX_CONCURRENCY = 8  # Chat completions in flight at once (chunks of one or many files)
+
+# AI map-reduce - the extracted text is sent in chunks of about AI_CHUNK_TOKENS estimated tokens,
+# at most AI_MAX_CHUNKS per document (larger decks are sampled evenly), and the chunk analyses reduced
+AI_CHUNK_TOKENS = 1500
+AI_MAX_CHUNKS = 12
+
+# AI response cache - bump AI_PROMPT_VERSION whenever build_ai_request, parse_ai_response or the
+# chunk settings change; responses cached under other versions are deleted at start-up
+AI_PROMPT_VERSION = "2"
+AI_CACHE_PATH = Path(".cache") / "llm_responses.sqlite3"
+AI_CACHE_MEMORY_ENTRIES = 256
+AI_CACHE_TTL_DAYS = 30
+
+# AI usage ledger - every call and cache hit is logged; costs use these USD prices per 1M
+# (prompt, completion) tokens, so update them when OpenAI's pricing changes
+AI_USAGE_PATH = Path(".cache") / "ai_usage.sqlite3"
+AI_PRICING = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+}
+AI_COMPLETION_TOKENS_ESTIMATE = 700  # Per chunk, for pre-flight estimates without usage history
+
+# PDF extraction - split large decks across a process pool
+PDF_PARALLEL_EXTRACTION = True
+PDF_PARALLEL_WORKERS = 4  # At most; fewer when the file's workers would not fit EXTRACTION_MEMORY_LIMIT_MB
+PDF_PARALLEL_MIN_PAGES = 64  # Smaller files are extracted in-process
+
+# Extraction cache - bump EXTRACTOR_VERSION whenever extraction output changes
+EXTRACTOR_VERSION = "2"
+EXTRACTION_CACHE_DIR = Path(".cache") / "extraction"
+EXTRACTION_CACHE_MAX_MB = 512
+
+# Extraction sandbox - each PDF/PPTX/DOCX/ODP is extracted in its own worker process; the memory
+# limit covers that process and its PDF page pool together
+EXTRACTION_TIMEOUT_SECONDS = 120
+EXTRACTION_MEMORY_LIMIT_MB = 1024
+
+# Course-folder archives - members are decompressed in memory one at a time
+ARCHIVE_MAX_MEMBER_MB = 200
+
+# CLO scoring modes - BM25 ranks against an inverted index of the program corpus and assessed decks
+SCORING_MODES = {
+    'rule': 'Rule-based (keyword coverage)',
+    'bm25': 'BM25 (term frequency, corpus-weighted)',
+    'semantic': 'Semantic (offline LSA similarity)'
+}
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_MAX_DECKS = 5000  # Least recently assessed decks leave the index beyond this
+
+# Offline semantic mode - hashed character n-grams projected by an LSA fitted on the program texts
+SEMANTIC_CACHE_DIR = Path(".cache") / "semantic"
+SEMANTIC_DIMS = 2 ** 14
+SEMANTIC_NGRAM_RANGE = (2, 4)
+SEMANTIC_RANK = 64
+SEMANTIC_FULL_MATCH = 0.6  # Similarity that earns a full CLO score (a CLO's own text scores ~0.75)
+
+@st.cache_resource
+def get_llm_cache():
+    """Shared AI response cache (memory LRU over SQLite) for all sessions and restarts"""
+    cache = LLMResponseCache(AI_CACHE_PATH, max_memory_entries=AI_CACHE_MEMORY_ENTRIES,
+                             ttl_seconds=AI_CACHE_TTL_DAYS * 24 * 3600)
+    cache.invalidate(keep_prompt_version=AI_PROMPT_VERSION)
+    return cache
 
-def extract_text_from_file(uploaded_file):
-    """Extract text from uploaded files"""
+@st.cache_resource
+def get_usage_ledger():
+    """Shared AI usage ledger for all sessions and restarts"""
+    return UsageLedger(AI_USAGE_PATH, AI_PRICING)
+
+@st.cache_resource
+def get_extraction_cache():
+    """Shared on-disk extraction cache for all sessions"""
+    return ExtractionCache(EXTRACTION_CACHE_DIR, max_bytes=EXTRACTION_CACHE_MAX_MB * 1024 * 1024)
+
+def extract_document_from_file(upload):
+    """Extract a slide-structured Document from an ingested upload (see utils.upload_ingest)"""
     try:
-        if uploaded_file.type == "text/plain":
-            return str(uploaded_file.read(), "utf-8")
-        elif uploaded_file.type == "application/pdf":
-            return extract_pdf_content(uploaded_file)
-        elif uploaded_file.type in ["application/vnd.ms-powerpoint", 
-                                   "application/vnd.openxmlformats-officedocument.presentationml.presentation"]:
-            return extract_pptx_content(uploaded_file)
+        kind = extractor_kind(upload.name, upload.type)
+        if kind == "pdf":
+            sections = extract_with_cache(upload, kind, extract_pdf_content)
+        elif kind is not None:
+            sections = extract_with_cache(upload, kind, lambda u: extract_sections_content(u, kind))
+        elif upload.type == "text/plain":
+            return Document.from_text(upload.read_text("utf-8"), name=upload.name)
         else:
-            # Generate mock content for unsupported formats
-            return generate_mock_content_from_filename(uploaded_file.name)
+            raise ExtractionError('invalid', f"ไม่รองรับไฟล์ประเภท {upload.type or Path(upload.name).suffix}", upload.name)
+    except ExtractionError:
+        # Failures are reported per file by the caller instead of scoring made-up content
+        raise
     except Exception as e:
-        st.error(f"Error extracting content: {e}")
-        return generate_mock_content_from_filename(uploaded_file.name)
-
-def extract_pdf_content(uploaded_file):
-    """Extract content from PDF (mock implementation)"""
-    # In a real implementation, you would use libraries like PyPDF2 or pdfplumber
-    # For demo purposes, we'll generate relevant content based on filename
-    filename = uploaded_file.name
-    return generate_mock_content_from_filename(filename)
-
-def extract_pptx_content(uploaded_file):
-    """Extract content from PowerPoint (mock implementation)"""
-    # In a real implementation, you would use python-pptx library
-    # For demo purposes, we'll generate relevant content based on filename
-    filename = uploaded_file.name
-    return generate_mock_content_from_filename(filename)
-
-def generate_mock_content_from_filename(filename):
-    """Generate mock content based on filename"""
-    base_content = f"""
-# Extracted from: {filename}
-Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-## Course Content Analysis
-
-### Introduction to Environmental Management
-Environmental management requires systematic integration of technology and community participation.
-Modern challenges demand innovative solutions using GIS, Remote Sensing, and advanced modeling techniques.
-
-### Technology Applications
-- Geographic Information Systems (GIS) for spatial analysis
-- Remote sensing technology for environmental monitoring
-- Statistical analysis and data interpretation methods
-- Sustainable development approaches with community involvement
-
-### Research Methodologies
-Systematic research approaches ensure reliable data collection and analysis.
-Literature review processes help identify knowledge gaps and research opportunities.
-Integration of multidisciplinary knowledge provides comprehensive understanding.
-
-### Communication and Knowledge Transfer
-Effective communication requires understanding target audiences and selecting appropriate channels.
-Visual presentations, charts, and multimedia resources enhance learning effectiveness.
-Public participation and stakeholder engagement are essential for sustainable solutions.
-
-### Case Studies and Applications
-Real-world examples demonstrate practical applications of theoretical concepts.
-Community-based research projects show integration of technology and participation.
-Environmental monitoring systems provide data for evidence-based decision making.
-    """
-    
-    # Add specific content based on filename keywords
-    filename_lower = filename.lower()
-    
-    if 'น้ำ' in filename_lower or 'water' in filename_lower:
-        base_content += """
-
-### Water Resource Management
-Sustainable water resource management requires comprehensive planning and community participation.
-GIS technology enables watershed analysis and water quality assessment.
-Integrated water resource management considers multiple stakeholders and uses.
-"""
-    
-    if 'ภูมิอากาศ' in filename_lower or 'climate' in filename_lower:
-        base_content += """
-
-### Climate Change Management
-Climate monitoring technology provides essential data for understanding changes.
-Adaptation and mitigation strategies require integrated approaches.
-Carbon capture and renewable energy technologies offer solutions.
-"""
-    
-    if 'วิจัย' in filename_lower or 'research' in filename_lower:
-        base_content += """
-
-### Research Methodology
-Systematic literature review ensures comprehensive knowledge base.
-Data collection methods must be appropriate for research objectives.
-Statistical analysis and interpretation require careful consideration.
-Academic writing standards ensure clear communication of results.
-"""
-    
-    return base_content
-
-@st.cache_data
-def generate_ai_analysis(content_hash, course_code, use_ai=False, model_name=DEFAULT_MODEL):
-    """Generate AI analysis using OpenAI API or fall back to mock analysis"""
-    
-    if use_ai and check_ai_availability():
+        raise ExtractionError('invalid', str(e), upload.name)
+    
+    return Document.from_sections(sections, name=upload.name)
+
+def expand_uploaded_files(uploaded_files):
+    """Replace each uploaded .zip with its supported members; returns (sources, failures)"""
+    sources = []
+    failures = []
+    for uploaded_file in uploaded_files:
+        if Path(uploaded_file.name).suffix.lower() != '.zip':
+            sources.append(uploaded_file)
+            continue
         try:
-            from openai import OpenAI
-            
-            # Initialize OpenAI client
-            client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-            
-            # Get course information
-            course_info = COURSE_DESCRIPTIONS.get(course_code, {})
-            course_name = course_info.get('name', 'Unknown Course')
-            course_clos = course_info.get('clo', {})
-            course_keywords = course_info.get('keywords', {})
-            
-            # Prepare CLO information for the prompt
-            clo_details = []
-            for clo_code, clo_desc in course_clos.items():
-                keywords = course_keywords.get(clo_code, [])
-                clo_details.append(f"{clo_code}: {clo_desc}\nKeywords: {', '.join(keywords)}")
-            
-            # Create the analysis prompt
-            system_prompt = """You are an expert educational assessment AI specializing in analyzing course content alignment with learning outcomes. 
+            sources.extend(list_archive_members(uploaded_file))
+        except zipfile.BadZipFile as e:
+            failures.append(ExtractionError('invalid', f"ไฟล์ ZIP เสียหาย: {str(e)}", uploaded_file.name).to_dict())
+    return sources, failures
+
+def ingest_source(source):
+    """Spool a direct upload once; archive members stay in memory and never touch disk"""
+    if isinstance(source, ArchiveMember):
+        return source.ingest(max_bytes=ARCHIVE_MAX_MEMBER_MB * 1024 * 1024)
+    return ingest_upload(source)
+
+def extract_with_cache(upload, kind, extract_func):
+    """Return cached sections for identical upload bytes, extracting only on a miss"""
+    cache = get_extraction_cache()
+    # The SHA-256 was computed while spooling, so the bytes are not hashed again here
+    cache_key = ExtractionCache.make_key(upload.sha256, EXTRACTOR_VERSION, kind)
+    
+    sections = cache.get(cache_key)
+    if sections is not None:
+        st.caption(f"⚡ {upload.name}: ใช้ข้อความที่สกัดไว้แล้วจากแคช")
+        return sections
+    
+    sections = extract_func(upload)
+    cache.put(cache_key, sections)
+    return sections
+
+def extract_pdf_content(upload):
+    """Extract per-page text from PDF in an isolated worker process"""
+    pages, stats = run_isolated_extraction(
+        'pdf',
+        upload.source,
+        file_name=upload.name,
+        timeout=EXTRACTION_TIMEOUT_SECONDS,
+        memory_limit_mb=EXTRACTION_MEMORY_LIMIT_MB,
+        pdf_options={
+            'parallel': PDF_PARALLEL_EXTRACTION,
+            'max_workers': PDF_PARALLEL_WORKERS,
+            'min_parallel_pages': PDF_PARALLEL_MIN_PAGES,
+            'memory_limit_mb': EXTRACTION_MEMORY_LIMIT_MB
+        }
+    )
+    
+    st.caption(f"📄 {upload.name}: {stats['pages']} หน้า | {stats['pages_per_second']} หน้า/วินาที "
+               f"({stats['mode']}, {stats['workers']} workers)")
+    if not any(page.strip() for page in pages):
+        st.warning(f"⚠️ ไม่พบข้อความในไฟล์ {upload.name} (อาจเป็น PDF ที่สแกนเป็นภาพ)")
+    return pages
+
+def extract_sections_content(upload, kind):
+    """Extract per-slide/per-section text with the extractor registered for kind (see utils.extractors)"""
+    if not is_isolated(kind):
+        sections, _ = extract_document(kind, upload.source)
+    else:
+        sections, _ = run_isolated_extraction(
+            kind,
+            upload.source,
+            file_name=upload.name,
+            timeout=EXTRACTION_TIMEOUT_SECONDS,
+            memory_limit_mb=EXTRACTION_MEMORY_LIMIT_MB
+        )
+    
+    if not any(section.strip() for section in sections):
+        st.warning(f"⚠️ ไม่พบข้อความในไฟล์ {upload.name}")
+    return sections
+
+def build_ai_request(content, course_code, model_name=DEFAULT_MODEL, part=1, parts=1):
+    """Chat-completion arguments for the CLO alignment analysis of one chunk of extracted text"""
+    # Get course information
+    course_info = COURSE_DESCRIPTIONS.get(course_code, {})
+    course_name = course_info.get('name', 'Unknown Course')
+    course_clos = course_info.get('clo', {})
+    course_keywords = course_info.get('keywords', {})
+    
+    # Prepare CLO information for the prompt
+    clo_details = []
+    for clo_code, clo_desc in course_clos.items():
+        keywords = course_keywords.get(clo_code, [])
+        clo_details.append(f"{clo_code}: {clo_desc}\nKeywords: {', '.join(keywords)}")
+    
+    # Create the analysis prompt
+    system_prompt = """You are an expert educational assessment AI specializing in analyzing course content alignment with learning outcomes. 
             You provide detailed, accurate assessments of how well content matches Course Learning Outcomes (CLOs).
             Respond in JSON format with scores, confidence levels, and insights."""
-            
-            user_prompt = f"""Analyze the following content for alignment with Course Learning Outcomes (CLOs).
+    
+    user_prompt = f"""Analyze the following content for alignment with Course Learning Outcomes (CLOs).
 
 Course: {course_code} - {course_name}
 
 Course Learning Outcomes:
 {chr(10).join(clo_details)}
 
-Content to analyze:
-{content_hash[:1000]}  # Using first 1000 chars as sample
+Content to analyze (part {part} of {parts}):
+{content}
 
 For each CLO, provide:
 1. A score from 0-100 indicating alignment percentage
@@ -416,90 +500,94 @@ Return the response in this exact JSON format:
     "recommendations": ["recommendation1", "recommendation2", "recommendation3"]
 }}"""
 
-            # Call OpenAI API
-            response = client.chat.completions.create(
-                model=model_name,  # Use configurable model
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Lower temperature for more consistent analysis
-                response_format={"type": "json_object"}  # Ensure JSON response
-            )
-            
-            # Parse the response
-            import json
-            ai_response = json.loads(response.choices[0].message.content)
-            
-            # Format results to match expected structure
-            ai_results = {
-                'ai_generated': True,
-                'analysis_id': content_hash[:8],
-                'content_analysis': {},
-                'recommendations': ai_response.get('recommendations', []),
-                'confidence_scores': {},
-                'model_used': response.model,
-                'usage': {
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
-                }
+    return {
+        'model': model_name,  # Use configurable model
+        'messages': [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        'temperature': 0.3,  # Lower temperature for more consistent analysis
+        'response_format': {"type": "json_object"}  # Ensure JSON response
+    }
+
+def parse_ai_response(response, content_hash, course_code):
+    """Turn a chat completion into the analysis structure used by the engine"""
+    course_clos = COURSE_DESCRIPTIONS.get(course_code, {}).get('clo', {})
+    ai_response = json.loads(response.choices[0].message.content)
+    
+    # Format results to match expected structure
+    ai_results = {
+        'ai_generated': True,
+        'analysis_id': content_hash[:8],
+        'content_analysis': {},
+        'recommendations': ai_response.get('recommendations', []),
+        'confidence_scores': {},
+        'model_used': response.model,
+        'usage': {
+            'prompt_tokens': response.usage.prompt_tokens,
+            'completion_tokens': response.usage.completion_tokens,
+            'total_tokens': response.usage.total_tokens
+        }
+    }
+    
+    # Process CLO analysis
+    clo_analysis = ai_response.get('clo_analysis', {})
+    for clo_code in course_clos.keys():
+        if clo_code in clo_analysis:
+            clo_data = clo_analysis[clo_code]
+            ai_results['content_analysis'][clo_code] = {
+                'score': clo_data.get('score', 70),
+                'confidence': clo_data.get('confidence', 0.8),
+                'found_keywords': clo_data.get('found_keywords', []),
+                'ai_insights': clo_data.get('insights', [
+                    f"AI analysis completed for {clo_code}",
+                    f"Confidence level: {clo_data.get('confidence', 0.8)*100:.0f}%",
+                    f"Alignment score: {clo_data.get('score', 70)}%"
+                ])
             }
-            
-            # Process CLO analysis
-            clo_analysis = ai_response.get('clo_analysis', {})
-            for clo_code in course_clos.keys():
-                if clo_code in clo_analysis:
-                    clo_data = clo_analysis[clo_code]
-                    ai_results['content_analysis'][clo_code] = {
-                        'score': clo_data.get('score', 70),
-                        'confidence': clo_data.get('confidence', 0.8),
-                        'found_keywords': clo_data.get('found_keywords', []),
-                        'ai_insights': clo_data.get('insights', [
-                            f"AI analysis completed for {clo_code}",
-                            f"Confidence level: {clo_data.get('confidence', 0.8)*100:.0f}%",
-                            f"Alignment score: {clo_data.get('score', 70)}%"
-                        ])
-                    }
-                else:
-                    # Fallback if CLO not in response
-                    ai_results['content_analysis'][clo_code] = {
-                        'score': 70,
-                        'confidence': 0.75,
-                        'found_keywords': [],
-                        'ai_insights': [
-                            f"Limited alignment detected for {clo_code}",
-                            "Consider adding more relevant content",
-                            "Review CLO requirements"
-                        ]
-                    }
-            
-            # Add Thai recommendations if not provided
-            if not ai_results['recommendations']:
-                ai_results['recommendations'] = [
-                    "เพิ่มเนื้อหาให้สอดคล้องกับ CLO ที่มีคะแนนต่ำ",
-                    "ปรับปรุงการใช้คำสำคัญให้ชัดเจนขึ้น",
-                    "เสริมตัวอย่างและกรณีศึกษาที่เกี่ยวข้อง"
+        else:
+            # Fallback if CLO not in response
+            ai_results['content_analysis'][clo_code] = {
+                'score': 70,
+                'confidence': 0.75,
+                'found_keywords': [],
+                'ai_insights': [
+                    f"Limited alignment detected for {clo_code}",
+                    "Consider adding more relevant content",
+                    "Review CLO requirements"
                 ]
-            
-            # Log API usage for monitoring
-            st.sidebar.info(f"🤖 AI Tokens Used: {ai_results['usage']['total_tokens']}")
-            
-            return ai_results
-            
-        except Exception as e:
-            # Log error and fall back to mock analysis
-            error_msg = f"AI analysis failed (Model: {model_name}): {str(e)}."
-            if "model_not_found" in str(e) or "does not exist" in str(e):
-                error_msg += f"\n\nAvailable models: {', '.join(OPENAI_MODELS.keys())}"
-                error_msg += f"\n\nPlease try using 'gpt-3.5-turbo' or check your API access."
-            error_msg += "\n\nUsing mock analysis instead."
-            st.warning(error_msg)
-            # Continue to mock analysis below
-    
-    # Mock analysis implementation (existing code)
-    # Create deterministic seed from content and course
-    deterministic_seed = hash(f"{content_hash}_{course_code}") % (2**32)
+            }
+    
+    # Add Thai recommendations if not provided
+    if not ai_results['recommendations']:
+        ai_results['recommendations'] = [
+            "เพิ่มเนื้อหาให้สอดคล้องกับ CLO ที่มีคะแนนต่ำ",
+            "ปรับปรุงการใช้คำสำคัญให้ชัดเจนขึ้น",
+            "เสริมตัวอย่างและกรณีศึกษาที่เกี่ยวข้อง"
+        ]
+    
+    return ai_results
+
+def describe_ai_failure(error, model_name):
+    """User-facing message for a failed AI call"""
+    error_msg = f"AI analysis failed (Model: {model_name}): {str(error)}."
+    if "model_not_found" in str(error) or "does not exist" in str(error):
+        error_msg += f"\n\nAvailable models: {', '.join(OPENAI_MODELS.keys())}"
+        error_msg += f"\n\nPlease try using 'gpt-3.5-turbo' or check your API access."
+    return error_msg
+
+def generate_ai_analysis(content_hash, course_code, use_ai=False, model_name=DEFAULT_MODEL, content=None):
+    """Generate AI analysis of the content using OpenAI API or fall back to mock analysis"""
+    
+    if use_ai and content is not None and check_ai_availability():
+        return generate_ai_analyses([(content_hash, content_hash, content)], course_code, model_name)[content_hash]
+    
+    return generate_mock_analysis(content_hash, course_code)
+
+def generate_mock_analysis(content_hash, course_code):
+    """Deterministic stand-in for the AI analysis, derived from the content hash"""
+    # Create deterministic seed from content and course - stable across processes, unlike hash()
+    deterministic_seed = stable_seed(content_hash, course_code, purpose="mock-analysis")
     random.seed(deterministic_seed)
     
     course_info = COURSE_DESCRIPTIONS.get(course_code, {})
@@ -565,44 +653,268 @@ Return the response in this exact JSON format:
     
     return ai_results
 
-class MultiLevelAssessmentEngine:
-    """Multi-Level Assessment Engine for CLO-PLO-YLO alignment with AI support"""
+async def _complete_all(requests, max_concurrency, on_response):
+    """Run (key, create kwargs) chat completions, at most max_concurrency at a time"""
+    # on_response(key, response, error, latency_ms) runs in completion order
+    from openai import AsyncOpenAI
+    
+    client = AsyncOpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def complete(key, kwargs):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(**kwargs)
+                return key, response, None, (time.perf_counter() - started) * 1000
+            except Exception as e:
+                return key, None, e, (time.perf_counter() - started) * 1000
     
-    def __init__(self):
-        self.course_descriptions = COURSE_DESCRIPTIONS
-        self.ylo_structure = YLO_STRUCTURE
-        self.plos = ENHANCED_PLOS
+    try:
+        for finished in asyncio.as_completed([complete(key, kwargs) for key, kwargs in requests]):
+            on_response(*(await finished))
+    finally:
+        await client.close()
+
+def generate_ai_analyses(jobs, course_code, model_name=DEFAULT_MODEL, max_concurrency=AI_MAX_CONCURRENCY, on_result=None):
+    """AI analyses for an iterable of (key, content_hash, content) jobs; failed documents fall back to mock analysis"""
+    # Each document is split into token-budgeted chunks, every chunk of every document is analysed
+    # concurrently, and a document's chunk analyses are reduced once its last chunk returns.
+    # on_result(key, analysis) runs in completion order, e.g. to advance a progress bar.
+    # Every API call and cache hit is logged to the usage ledger
+    cache = get_llm_cache()
+    assessor = st.session_state.get('assessor_name', '').strip()
+    usage = []
+    analyses = {}
+    failures = []
+    total_tokens = 0
+    content_hashes = {}
+    chunk_weights = {}  # key -> estimated tokens of each chunk sent
+    chunk_totals = {}   # key -> chunks the whole document needed
+    chunk_results = defaultdict(dict)  # key -> {chunk index: analysis}
+    failed = set()
+    
+    def finish(key, ai_results):
+        analyses[key] = ai_results
+        if on_result:
+            on_result(key, ai_results)
+    
+    # Cached analyses are handed back immediately; only the rest go to the API
+    requests = []
+    job_count = 0
+    for key, content_hash, content in jobs:
+        job_count += 1
+        started = time.perf_counter()
+        cached = cache.get(content_hash, course_code, model_name, AI_PROMPT_VERSION)
+        if cached is not None:
+            usage.append(UsageRecord(course_code, assessor, model_name, content_hash, 0, 0,
+                                     (time.perf_counter() - started) * 1000, True, True))
+            finish(key, cached)
+            continue
+        
+        chunks, total = chunk_sections(as_document(content).sections(), AI_CHUNK_TOKENS, AI_MAX_CHUNKS)
+        if not chunks:
+            finish(key, generate_mock_analysis(content_hash, course_code))
+            continue
+        
+        content_hashes[key] = content_hash
+        chunk_weights[key] = [tokens for _, tokens in chunks]
+        chunk_totals[key] = total
+        for index, (text, _) in enumerate(chunks):
+            requests.append(((key, index), build_ai_request(text, course_code, model_name, index + 1, len(chunks))))
+    
+    def collect(request_key, response, error, latency_ms):
+        nonlocal total_tokens
+        key, index = request_key
+        if error is None:
+            try:
+                chunk_results[key][index] = parse_ai_response(response, content_hashes[key], course_code)
+                total_tokens += chunk_results[key][index]['usage']['total_tokens']
+            except Exception as e:
+                error = e
+        # Tokens are billed whenever the API answered, even if the answer could not be parsed
+        tokens = getattr(response, 'usage', None)
+        usage.append(UsageRecord(course_code, assessor, model_name, content_hashes[key],
+                                 getattr(tokens, 'prompt_tokens', 0), getattr(tokens, 'completion_tokens', 0),
+                                 latency_ms, False, error is None))
+        if error is not None:
+            # One failed chunk would skew the reduction, so the whole document uses mock analysis
+            if key not in failed:
+                failed.add(key)
+                failures.append(error)
+                finish(key, generate_mock_analysis(content_hashes[key], course_code))
+            return
+        if key in failed or len(chunk_results[key]) < len(chunk_weights[key]):
+            return
+        
+        ordered = [chunk_results[key][i] for i in range(len(chunk_weights[key]))]
+        ai_results = reduce_chunk_analyses(ordered, chunk_weights[key], chunk_totals[key])
+        del chunk_results[key]
+        cache.put(content_hashes[key], course_code, model_name, AI_PROMPT_VERSION, ai_results)
+        finish(key, ai_results)
     
-    def preprocess_text(self, text):
-        """Clean and preprocess text"""
-        if not text:
-            return ""
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        text = re.sub(r'\s+', ' ', text.strip())
-        return text
+    try:
+        if requests:
+            asyncio.run(_complete_all(requests, max(1, max_concurrency), collect))
+    finally:
+        get_usage_ledger().record(usage)
+    
+    if failures:
+        st.warning(f"{describe_ai_failure(failures[0], model_name)}\n\n"
+                   f"{len(failures)}/{job_count} files used mock analysis instead.")
+    if total_tokens:
+        cost = sum(estimate_cost(AI_PRICING, record.model, record.prompt_tokens, record.completion_tokens)
+                   for record in usage)
+        st.sidebar.info(f"🤖 AI Tokens Used: {total_tokens} (≈ ${cost:.4f})")
+    return analyses
+
+def estimate_ai_batch(file_count, course_code, model_name=DEFAULT_MODEL):
+    """Pre-flight (upper bound, expected) AI calls, tokens and cost for a batch of not yet extracted files"""
+    # The upper bound charges every file the full AI_MAX_CHUNKS chunks; the expected figures use the
+    # ledger's mean per analysed document for this course and model, or None without history
+    prompt_overhead = sum(estimate_tokens(message['content'])
+                          for message in build_ai_request("", course_code, model_name)['messages'])
+    calls = file_count * AI_MAX_CHUNKS
+    upper = {
+        'calls': calls,
+        'prompt_tokens': calls * (AI_CHUNK_TOKENS + prompt_overhead),
+        'completion_tokens': calls * AI_COMPLETION_TOKENS_ESTIMATE
+    }
     
-    def calculate_clo_alignment(self, content, course_code, ai_analysis=None):
+    expected = None
+    history = get_usage_ledger().document_averages(model_name, course_code)
+    if history is not None:
+        expected = dict(zip(('calls', 'prompt_tokens', 'completion_tokens'), (file_count * value for value in history)))
+    
+    for estimate in (upper, expected):
+        if estimate is not None:
+            estimate['cost_usd'] = estimate_cost(AI_PRICING, model_name, estimate['prompt_tokens'],
+                                                 estimate['completion_tokens'])
+    return upper, expected
+
+@st.cache_resource
+def get_tokenizer():
+    """Thai/English tokenizer seeded with every course keyword, built once per process"""
+    return build_course_tokenizer(COURSE_DESCRIPTIONS)
+
+@st.cache_resource
+def get_program_model():
+    """Immutable, pre-tokenised course/PLO/YLO model shared by every session (see utils.course_model)"""
+    return compile_program_model(COURSE_DESCRIPTIONS, YLO_STRUCTURE, ENHANCED_PLOS, get_tokenizer())
+
+@st.cache_resource
+def get_bm25_index():
+    """Program-wide BM25 index (course and CLO texts pinned) and per-course CLO query matrices"""
+    return build_program_index(COURSE_DESCRIPTIONS, get_tokenizer(), k1=BM25_K1, b=BM25_B,
+                               max_documents=BM25_MAX_DECKS)
+
+@st.cache_resource
+def get_semantic_model():
+    """LSA model with CLO/YLO vectors, loaded from .cache/semantic or fitted once for this configuration"""
+    return load_or_fit_semantic_model(
+        SEMANTIC_CACHE_DIR, COURSE_DESCRIPTIONS, YLO_STRUCTURE, ENHANCED_PLOS,
+        dims=SEMANTIC_DIMS, ngram_range=SEMANTIC_NGRAM_RANGE, rank=SEMANTIC_RANK
+    )
+
+def describe_calculation_method(scoring_mode='rule'):
+    """How each overall average is computed, for display"""
+    return {
+        'clo': 'Simple average of all CLO scores' + (
+            f' ({scoring_mode}: 50 + 50 x relevance)' if scoring_mode != 'rule' else ''
+        ),
+        'plo': 'Weighted average by PLO importance (35%, 35%, 30%)',
+        'ylo': 'Weighted average by cognitive complexity'
+    }
+
+class MultiLevelAssessmentEngine:
+    """Multi-Level Assessment Engine for CLO-PLO-YLO alignment with AI support"""
+    
+    def __init__(self, scoring_mode='rule'):
+        # Course, PLO and YLO data are read from the compiled program model only
+        self.model = get_program_model()
+        self.tokenizer = self.model.tokenizer
+        self.scoring_mode = scoring_mode if scoring_mode in SCORING_MODES else 'rule'
+    
+    def tokenize_document(self, document):
+        """Token stream for a Document, computed once and reused by every scoring stage"""
+        return document.derived('tokens', self.tokenizer.tokenize_document)
+    
+    def find_course_terms(self, document):
+        """Keyword/description-term hits of every course in one automaton pass, memoised per document"""
+        # The automaton restarts at each slide, so a keyword only counts when it lies within one slide
+        def scan(doc):
+            stream = self.tokenize_document(doc)
+            return self.model.automaton.scan(stream.tokens, boundaries=stream.slide_offsets)
+        return document.derived('course_hits', scan)
+    
+    def bm25_relevance(self, document, course_code, start, end):
+        """Normalised BM25 relevance (0-1) of tokens[start:end] to each CLO of a course"""
+        index, queries = get_bm25_index()
+        tokens = self.tokenize_document(document).tokens
+        
+        if (start, end) != (0, len(tokens)):
+            # Slide ranges are scored without being indexed
+            vector, length = index.vectorize(tokens[start:end])
+        elif document.derived('bm25_draft', lambda doc: False):
+            vector, length = document.derived('bm25_vector', lambda doc: index.vectorize(tokens))
+        else:
+            # A submitted deck joins the corpus once
+            vector, length = document.derived('bm25_vector', lambda doc: index.add_document(
+                f"deck:{stable_digest(doc.text, purpose='bm25-deck')}", tokens
+            ))
+        
+        query = queries[course_code]
+        return dict(zip(query.row_codes, index.score(vector, length, query).tolist()))
+    
+    def analyze_text_incrementally(self, analyzer, text):
+        """Document for edited text whose tokens and keyword hits come from the analyzer's paragraph cache"""
+        document, stream, hits = analyzer.update(text)
+        document.derived('tokens', lambda doc: stream)
+        document.derived('course_hits', lambda doc: hits)
+        # Every edit is a new text, so drafts are scored against the BM25 corpus without joining it
+        document.derived('bm25_draft', lambda doc: True)
+        return document
+    
+    def embed_document(self, document, slide_range=None):
+        """Latent semantic vector of a document (memoised) or of one slide range"""
+        model = get_semantic_model()
+        if not slide_range:
+            return document.derived('semantic_vector', lambda doc: model.embed(doc.text))
+        start, end = document.char_bounds(*slide_range)
+        return model.embed(document.text[start:end])
+    
+    def semantic_relevance(self, document, course_code, slide_range=None):
+        """Semantic similarity of the content to each CLO, scaled to 0-1 by SEMANTIC_FULL_MATCH"""
+        similarity = get_semantic_model().clo_similarity(course_code, self.embed_document(document, slide_range))
+        return {clo_code: min(1.0, max(0.0, value) / SEMANTIC_FULL_MATCH) for clo_code, value in similarity.items()}
+    
+    def calculate_clo_alignment(self, content, course_code, ai_analysis=None, slide_range=None):
         """Calculate Course Learning Outcome alignment with optional AI support - deterministic"""
-        if course_code not in self.course_descriptions:
+        if course_code not in self.model.courses:
             return {}
         
-        course_data = self.course_descriptions[course_code]
-        content_processed = self.preprocess_text(content)
+        # content may be text or a Document; slide_range=(start, stop) limits matching to
+        # the token span of those slides - hits come from one scan of the whole document
         
-        # Create deterministic seed for this analysis
-        analysis_seed = hash(f"{content_processed[:100]}_{course_code}") % (2**32)
+        course = self.model.courses[course_code]
+        document = as_document(content)
+        stream = self.tokenize_document(document)
+        hits = self.find_course_terms(document)
+        start, end = stream.token_bounds(*slide_range) if slide_range else (0, len(stream.tokens))
         
+        if self.scoring_mode == 'bm25':
+            relevance = self.bm25_relevance(document, course_code, start, end)
+        elif self.scoring_mode == 'semantic':
+            relevance = self.semantic_relevance(document, course_code, slide_range)
+        else:
+            relevance = {}
         clo_results = {}
         
-        for clo_code, clo_description in course_data['clo'].items():
+        for clo in course.clos:
             # Find keywords for this CLO
-            keywords = course_data['keywords'].get(clo_code, [])
-            found_keywords = []
-            
-            for keyword in keywords:
-                keyword_processed = self.preprocess_text(keyword)
-                if keyword_processed in content_processed:
-                    found_keywords.append(keyword)
+            keywords = clo.keywords
+            found_keywords = [keyword for keyword, pattern_id in zip(keywords, clo.keyword_ids)
+                              if hits.found(pattern_id, start, end)]
             
             # Calculate base score - deterministic
             if keywords:
@@ -611,20 +923,23 @@ class MultiLevelAssessmentEngine:
                 coverage_score = coverage * 40
                 
                 # Bonus for description relevance - deterministic
-                desc_words = self.preprocess_text(clo_description).split()
-                desc_matches = sum(1 for word in desc_words if word in content_processed)
+                desc_matches = sum(1 for pattern_id in clo.term_ids if hits.found(pattern_id, start, end))
                 desc_bonus = min(desc_matches * 2, 10)
                 
                 final_score = min(100, base_score + coverage_score + desc_bonus)
             else:
                 final_score = 50
             
+            # BM25 and semantic modes replace the presence-based score, keeping the same 50-100 range
+            if clo.code in relevance:
+                final_score = 50 + 50 * relevance[clo.code]
+            
             # Apply AI enhancement if available - keep AI scores consistent
             confidence = 0.8  # Default confidence
             ai_insights = []
             
-            if ai_analysis and clo_code in ai_analysis.get('content_analysis', {}):
-                ai_data = ai_analysis['content_analysis'][clo_code]
+            if ai_analysis and clo.code in ai_analysis.get('content_analysis', {}):
+                ai_data = ai_analysis['content_analysis'][clo.code]
                 ai_score = ai_data['score']
                 confidence = ai_data['confidence']
                 
@@ -634,9 +949,9 @@ class MultiLevelAssessmentEngine:
                 # Add AI insights
                 ai_insights = ai_data.get('ai_insights', [])
             
-            clo_results[clo_code] = {
+            clo_results[clo.code] = {
                 'score': round(final_score, 1),
-                'description': clo_description,
+                'description': clo.description,
                 'found_keywords': found_keywords,
                 'total_keywords': len(keywords),
                 'coverage': len(found_keywords) / len(keywords) if keywords else 0,
@@ -644,21 +959,28 @@ class MultiLevelAssessmentEngine:
                 'ai_insights': ai_insights,
                 'ai_enhanced': ai_analysis is not None and ai_analysis.get('ai_generated', False)
             }
+            if clo.code in relevance:
+                clo_results[clo.code][f'{self.scoring_mode}_relevance'] = round(relevance[clo.code], 3)
         
         return clo_results
     
-    def calculate_multi_level_alignment(self, content, course_code, ai_analysis=None):
+    def calculate_multi_level_alignment(self, content, course_code, ai_analysis=None, content_hash=None, slide_range=None):
         """Calculate alignment across CLO-PLO-YLO levels with AI support"""
-        # Create content hash for tracking and ensure unique ID
-        content_hash = hashlib.md5(content.encode()).hexdigest()
+        document = as_document(content)
+        start, end = document.char_bounds(*slide_range) if slide_range else (0, len(document.text))
+        
+        # Create content hash for tracking unless the caller already has one (e.g. the upload digest)
+        if content_hash is None:
+            content_hash = hashlib.md5(document.text.encode()).hexdigest()
         
         results = {
             'assessment_id': generate_unique_assessment_id(),  # Use new unique ID function
             'course_code': course_code,
-            'course_name': self.course_descriptions.get(course_code, {}).get('name', 'Unknown'),
+            'course_name': self.model.courses[course_code].name if course_code in self.model.courses else 'Unknown',
             'content_hash': content_hash,
-            'content_length': len(content),
-            'content_preview': content[:200],
+            'content_length': end - start,
+            'content_preview': document.text[start:start + 200],
+            'scoring_mode': self.scoring_mode,
             'clo_results': {},
             'plo_results': {},
             'ylo_results': {},
@@ -669,109 +991,47 @@ class MultiLevelAssessmentEngine:
         }
         
         # 1. CLO Analysis with AI support
-        clo_results = self.calculate_clo_alignment(content, course_code, ai_analysis)
+        clo_results = self.calculate_clo_alignment(document, course_code, ai_analysis, slide_range)
         results['clo_results'] = clo_results
         
-        # 2. PLO Analysis (mapped from CLOs) - Fixed calculation
-        if course_code in self.course_descriptions:
-            course_data = self.course_descriptions[course_code]
-            mapped_plos = course_data.get('plo_mapping', [])
+        # 2. PLO Analysis (mapped from CLOs) - one product with the course's CLO x PLO weight matrix
+        course = self.model.courses.get(course_code)
+        if course is not None:
+            clo_scores = np.array([[clo_results[clo.code]['score'] for clo in course.clos]])
+            clo_confidence = np.array([[clo_results[clo.code]['confidence'] for clo in course.clos]])
+            plo_scores, plo_confidence = propagate_plos(course, clo_scores, clo_confidence)
             
-            for plo_code in mapped_plos:
-                # Find CLOs that specifically contribute to this PLO
-                # Based on course content and CLO descriptions
-                related_clos = []
-                
-                # Map CLOs to PLOs based on course design
-                if plo_code == 'PLO1':  # Technology and Participation
-                    # CLOs that involve technology, tools, sustainability
-                    related_clos = [clo for clo in clo_results.keys() 
-                                   if any(keyword in ['เทคโนโลยี', 'technology', 'GIS', 'ระบบ', 'ยั่งยืน', 'sustainable'] 
-                                         for keyword in course_data.get('keywords', {}).get(clo, []))]
-                elif plo_code == 'PLO2':  # Research and Integration  
-                    # CLOs that involve research, methodology, analysis
-                    related_clos = [clo for clo in clo_results.keys()
-                                   if any(keyword in ['วิจัย', 'research', 'วิธีการ', 'methodology', 'วิเคราะห์', 'analysis', 'บูรณาการ', 'integrate']
-                                         for keyword in course_data.get('keywords', {}).get(clo, []))]
-                elif plo_code == 'PLO3':  # Communication and Transfer
-                    # CLOs that involve communication, presentation, writing
-                    related_clos = [clo for clo in clo_results.keys()
-                                   if any(keyword in ['สื่อสาร', 'communicate', 'นำเสนอ', 'present', 'เขียน', 'writing', 'รายงาน', 'report']
-                                         for keyword in course_data.get('keywords', {}).get(clo, []))]
-                
-                # Fallback: if no specific mapping found, use all CLOs but with weights
-                if not related_clos:
-                    related_clos = list(clo_results.keys())
-                
-                # Calculate PLO score based on related CLOs only
-                if related_clos:
-                    # Weight CLOs based on relevance to PLO
-                    weighted_scores = []
-                    for clo in related_clos:
-                        weight = 1.0  # Default weight
-                        
-                        # Adjust weight based on CLO-PLO relevance
-                        clo_keywords = course_data.get('keywords', {}).get(clo, [])
-                        if plo_code == 'PLO1' and any(kw in ['เทคโนโลยี', 'technology', 'GIS'] for kw in clo_keywords):
-                            weight = 1.2
-                        elif plo_code == 'PLO2' and any(kw in ['วิจัย', 'research', 'วิเคราะห์'] for kw in clo_keywords):
-                            weight = 1.2  
-                        elif plo_code == 'PLO3' and any(kw in ['สื่อสาร', 'communicate', 'นำเสนอ'] for kw in clo_keywords):
-                            weight = 1.2
-                        
-                        weighted_scores.append(clo_results[clo]['score'] * weight)
-                    
-                    plo_score = sum(weighted_scores) / len(weighted_scores)
-                    avg_confidence = sum(clo_results[clo]['confidence'] for clo in related_clos) / len(related_clos)
-                else:
-                    plo_score = 0
-                    avg_confidence = 0
-                
-                results['plo_results'][plo_code] = {
-                    'score': round(plo_score, 1),
-                    'related_clos': related_clos,
-                    'description': self.plos[plo_code]['description'],
-                    'confidence': avg_confidence
+            for column, plo in enumerate(course.plo_links):
+                results['plo_results'][plo.code] = {
+                    'score': round(float(plo_scores[0, column]), 1),
+                    'related_clos': list(plo.related_clos),
+                    'description': plo.description,
+                    'confidence': float(plo_confidence[0, column])
                 }
         
-        # 3. YLO Analysis (mapped from PLOs)
-        if course_code in self.course_descriptions:
-            course_data = self.course_descriptions[course_code]
-            mapped_ylos = course_data.get('ylo_mapping', [])
+        # 3. YLO Analysis (mapped from the rounded PLO scores through the PLO x YLO matrix)
+        if course is not None:
+            rounded_plo_scores = np.array([[results['plo_results'][plo.code]['score'] for plo in course.plo_links]])
+            ylo_scores, ylo_confidence = propagate_ylos(course, rounded_plo_scores, plo_confidence)
             
-            for ylo_code in mapped_ylos:
-                ylo_data = self.ylo_structure[ylo_code]
-                related_plos = ylo_data['plo_mapping']
+            # Semantic mode also reports how close the content reads to each YLO description
+            ylo_similarity = (get_semantic_model().ylo_similarity(self.embed_document(document, slide_range))
+                              if self.scoring_mode == 'semantic' else {})
+            for column, ylo in enumerate(course.ylos):
+                ylo_score = float(ylo_scores[0, column])
+                avg_confidence = float(ylo_confidence[0, column])
                 
-                # Calculate YLO score based on PLO scores
-                ylo_scores = []
-                confidences = []
-                for plo_code in related_plos:
-                    if plo_code in results['plo_results']:
-                        ylo_scores.append(results['plo_results'][plo_code]['score'])
-                        confidences.append(results['plo_results'][plo_code]['confidence'])
-                
-                ylo_score = sum(ylo_scores) / len(ylo_scores) if ylo_scores else 0
-                avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-                
-                # Calculate cognitive multiplier based on cognitive level
-                cognitive_weights = {
-                    'Understanding': 1.0,
-                    'Applying': 1.1,
-                    'Evaluating': 1.2,
-                    'Creating': 1.3
-                }
-                cognitive_multiplier = cognitive_weights.get(ylo_data['cognitive_level'], 1.0)
-                
-                results['ylo_results'][ylo_code] = {
+                results['ylo_results'][ylo.code] = {
                     'score': round(ylo_score, 1),
-                    'related_plos': related_plos,
-                    'description': ylo_data['description'],
-                    'level': ylo_data['level'],
-                    'cognitive_level': ylo_data['cognitive_level'],
+                    'related_plos': list(ylo.related_plos),
+                    'description': ylo.description,
+                    'level': ylo.level,
+                    'cognitive_level': ylo.cognitive_level,
                     'confidence': round(avg_confidence, 3),
-                    'cognitive_multiplier': cognitive_multiplier
+                    'cognitive_multiplier': ylo.cognitive_multiplier
                 }
+                if ylo.code in ylo_similarity:
+                    results['ylo_results'][ylo.code]['semantic_similarity'] = round(ylo_similarity[ylo.code], 3)
         
         # 4. Create alignment matrix
         results['alignment_matrix'] = self.create_alignment_matrix(results)
@@ -785,7 +1045,7 @@ class MultiLevelAssessmentEngine:
             plo_weighted_sum = 0
             total_weight = 0
             for plo_code, plo_data in results['plo_results'].items():
-                weight = self.plos[plo_code]['weight'] / 100  # Convert percentage to decimal
+                weight = self.model.plo_weights[plo_code]  # Already a decimal fraction
                 plo_weighted_sum += plo_data['score'] * weight
                 total_weight += weight
             plo_average = plo_weighted_sum / total_weight if total_weight > 0 else 0
@@ -798,13 +1058,7 @@ class MultiLevelAssessmentEngine:
             total_cognitive_weight = 0
             for ylo_code, ylo_data in results['ylo_results'].items():
                 # Weight by cognitive level complexity
-                cognitive_weights = {
-                    'Understanding': 1.0,
-                    'Applying': 1.1, 
-                    'Evaluating': 1.2,
-                    'Creating': 1.3
-                }
-                weight = cognitive_weights.get(ylo_data['cognitive_level'], 1.0)
+                weight = ylo_data['cognitive_multiplier']
                 ylo_weighted_sum += ylo_data['score'] * weight
                 total_cognitive_weight += weight
             ylo_average = ylo_weighted_sum / total_cognitive_weight if total_cognitive_weight > 0 else 0
@@ -819,15 +1073,51 @@ class MultiLevelAssessmentEngine:
             'plo_average': round(plo_average, 1), 
             'ylo_average': round(ylo_average, 1),
             'overall_confidence': round(overall_confidence, 3),
-            'calculation_method': {
-                'clo': 'Simple average of all CLO scores',
-                'plo': 'Weighted average by PLO importance (35%, 35%, 30%)',
-                'ylo': 'Weighted average by cognitive complexity'
-            }
+            'calculation_method': describe_calculation_method(self.scoring_mode)
         }
         
         return results
     
+    def compact_results(self, results):
+        """Numeric-only record of a result dict for long-lived storage (see utils.compact_results)"""
+        return compact_assessment(results, self.model.courses[results['course_code']])
+    
+    def expand_results(self, record):
+        """Full result dict for display, with descriptions resolved from the course model"""
+        results = expand_assessment(record, self.model.courses[record.course_code])
+        results['overall_scores']['calculation_method'] = describe_calculation_method(record.scoring_mode)
+        results['alignment_matrix'] = self.create_alignment_matrix(results)
+        return results
+    
+    def slide_alignment(self, content, course_code):
+        """Per-slide CLO hits with prefix sums for O(1) slide-range scoring, memoised per document"""
+        document = as_document(content)
+        return document.derived(('slide_alignment', course_code), lambda doc: build_slide_alignment(
+            self.model.courses[course_code],
+            self.find_course_terms(doc),
+            self.tokenize_document(doc).slide_offsets
+        ))
+    
+    def rank_courses(self, content):
+        """Score content against every course from one shared keyword scan, best match first"""
+        document = as_document(content)
+        ranking = []
+        for course_code, course in self.model.courses.items():
+            clo_results = self.calculate_clo_alignment(document, course_code)
+            found_keywords = sum(len(clo['found_keywords']) for clo in clo_results.values())
+            total_keywords = sum(clo['total_keywords'] for clo in clo_results.values())
+            ranking.append({
+                'course_code': course_code,
+                'course_name': course.name,
+                'clo_average': round(sum(clo['score'] for clo in clo_results.values()) / len(clo_results), 1) if clo_results else 0,
+                'keyword_coverage': found_keywords / total_keywords if total_keywords else 0,
+                'found_keywords': found_keywords,
+                'clo_results': clo_results
+            })
+        
+        ranking.sort(key=lambda course: (course['clo_average'], course['keyword_coverage']), reverse=True)
+        return ranking
+    
     def create_alignment_matrix(self, results):
         """Create alignment matrix showing CLO-PLO-YLO relationships"""
         matrix = {
@@ -858,14 +1148,24 @@ class MultiLevelAssessmentEngine:
 class MultiFileAggregator:
     """Aggregate and analyze multiple files from the same course"""
     
-    def __init__(self):
-        self.engine = MultiLevelAssessmentEngine()
+    def __init__(self, scoring_mode='rule'):
+        self.engine = MultiLevelAssessmentEngine(scoring_mode)
+        self.file_assessments = []
+    
+    def add_assessment(self, results):
+        """Collect one file's results as a compact record; callers add files as they are scored, in upload order"""
+        self.file_assessments.append(self.engine.compact_results(results))
     
-    def aggregate_assessments(self, file_assessments):
-        """Aggregate multiple file assessments into comprehensive analysis"""
+    def aggregate_assessments(self, file_assessments=None):
+        """Aggregate multiple file assessments (compact records) into comprehensive analysis"""
+        if file_assessments is None:
+            file_assessments = self.file_assessments
         if not file_assessments:
             return None
         
+        # Full dicts exist only while aggregating; the session keeps the compact records
+        file_assessments = [self.engine.expand_results(record) for record in file_assessments]
+        
         # Get course info from first assessment
         course_code = file_assessments[0]['course_code']
         course_name = file_assessments[0]['course_name']
@@ -1221,7 +1521,7 @@ def create_enhanced_gauge_chart(score, title="Score", confidence=None):
     )
     return fig
 
-def create_multi_level_dashboard(results, key_prefix=""):
+def create_multi_level_dashboard(results, key_prefix="", document=None):
     """Create comprehensive multi-level dashboard with enhanced features"""
     st.header("🎯 Multi-Level Learning Outcome Assessment")
     
@@ -1236,6 +1536,8 @@ def create_multi_level_dashboard(results, key_prefix=""):
             st.success("🤖 AI Enhanced")
         else:
             st.info("📊 Rule-based")
+        if results.get('scoring_mode', 'rule') != 'rule':
+            st.caption(f"CLO scoring: {SCORING_MODES[results['scoring_mode']]}")
     with col3:
         if results.get('ai_enhanced', False):
             confidence = results['overall_scores'].get('overall_confidence', 0)
@@ -1306,6 +1608,8 @@ def create_multi_level_dashboard(results, key_prefix=""):
     
     with tab1:
         display_enhanced_clo_analysis(results['clo_results'], key_prefix)
+        if document is not None and len(document) > 1:
+            display_slide_heatmap(document, results['course_code'], key_prefix)
     
     with tab2:
         display_plo_analysis(results['plo_results'], key_prefix)
@@ -1644,6 +1948,66 @@ def display_enhanced_clo_analysis(clo_results, key_prefix=""):
                 else:
                     st.error("Needs Improvement")
 
+def display_slide_heatmap(document, course_code, key_prefix=""):
+    """Heatmap of which slides support which CLO, plus scores for any slide range"""
+    st.subheader("🗺️ Slide-by-Slide CLO Alignment")
+    
+    alignment = MultiLevelAssessmentEngine().slide_alignment(document, course_code)
+    slide_numbers = list(range(1, alignment.slide_count + 1))
+    coverage = alignment.slide_coverage().T * 100
+    hits = alignment.slide_hits().T
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=coverage,
+        x=slide_numbers,
+        y=alignment.clo_codes,
+        customdata=hits,
+        colorscale='Blues',
+        zmin=0,
+        colorbar=dict(title="Keyword<br>Coverage %"),
+        hovertemplate="Slide %{x}<br>%{y}: %{z:.0f}% (%{customdata} keywords)<extra></extra>"
+    ))
+    fig.update_layout(
+        height=120 + 40 * len(alignment.clo_codes),
+        xaxis_title="Slide / Page",
+        yaxis=dict(autorange='reversed'),
+        margin=dict(l=20, r=20, t=20, b=40)
+    )
+    st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_slide_heatmap")
+    
+    # Any lecture section is scored from two prefix-sum rows, without re-running the engine
+    first_slide, last_slide = st.slider(
+        "ช่วงสไลด์ที่ต้องการประเมิน:",
+        min_value=1,
+        max_value=alignment.slide_count,
+        value=(1, alignment.slide_count),
+        key=f"{key_prefix}_slide_range"
+    )
+    scores, range_coverage = alignment.range_scores(first_slide - 1, last_slide)
+    st.dataframe(pd.DataFrame({
+        'CLO': alignment.clo_codes,
+        'Rule-based Score (%)': scores,
+        'Keyword Coverage (%)': (range_coverage * 100).round(1)
+    }), use_container_width=True, hide_index=True)
+    st.caption(f"คะแนนแบบ Rule-based ของสไลด์ {first_slide}-{last_slide} (ไม่รวมผลการวิเคราะห์ AI)")
+
+def display_course_ranking(ranking):
+    """Show the auto-detected course ranking (see MultiLevelAssessmentEngine.rank_courses)"""
+    best = ranking[0]
+    st.info(f"🔎 รายวิชาที่ตรงกับเนื้อหามากที่สุด: **{best['course_code']} - {best['course_name']}** "
+            f"(CLO เฉลี่ย {best['clo_average']:.1f}%) - ผลการประเมินนี้ใช้รายวิชาดังกล่าว")
+    
+    ranking_df = pd.DataFrame([{
+        'Rank': rank,
+        'Course': f"{course['course_code']} - {course['course_name']}",
+        'CLO Average (%)': course['clo_average'],
+        'Keyword Coverage (%)': round(course['keyword_coverage'] * 100, 1),
+        'Keywords Found': course['found_keywords']
+    } for rank, course in enumerate(ranking, 1)])
+    
+    with st.expander("📚 คะแนนเทียบกับทุกรายวิชา"):
+        st.dataframe(ranking_df, use_container_width=True, hide_index=True)
+
 def display_plo_analysis(plo_results, key_prefix=""):
     """Display Program Learning Outcome analysis with gauge charts"""
     st.subheader("🎯 Program Learning Outcomes (PLO) Analysis")
@@ -2065,10 +2429,10 @@ def show_multiple_file_upload_interface():
     
     # File upload - now accepts multiple files
     uploaded_files = st.file_uploader(
-        "Choose your slide files (you can select multiple files)",
-        type=['pdf', 'pptx', 'ppt', 'txt'],
+        "Choose your slide files (you can select multiple files or a .zip of the course folder)",
+        type=supported_suffixes() + ['txt', 'zip'],
         accept_multiple_files=True,
-        help="Upload multiple files from the same course for comprehensive analysis"
+        help="Upload multiple files from the same course, or one .zip archive of the whole course folder"
     )
     
     # AI Analysis option
@@ -2103,14 +2467,19 @@ def show_multiple_file_upload_interface():
             st.info("Demo Mode")
     
     if uploaded_files:
+        # Archives are listed from their central directory; members are read during analysis
+        sources, archive_failures = expand_uploaded_files(uploaded_files)
+        for failure in archive_failures:
+            st.error(f"❌ {failure['file_name']}: {failure['message']}")
+        
         # File information
-        st.write(f"### 📄 {len(uploaded_files)} Files Selected")
+        st.write(f"### 📄 {len(sources)} Files Selected")
         
         # Show file details
         file_details = []
         total_size = 0
-        for file in uploaded_files:
-            file_size = len(file.getvalue()) / (1024 * 1024)
+        for file in sources:
+            file_size = file.size / (1024 * 1024)
             total_size += file_size
             file_details.append({
                 'File Name': file.name,
@@ -2125,72 +2494,135 @@ def show_multiple_file_upload_interface():
         # Summary metrics
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Files", len(uploaded_files))
+            st.metric("Total Files", len(sources))
         with col2:
             st.metric("Total Size", f"{total_size:.1f} MB")
         with col3:
             st.metric("Analysis Mode", "AI Enhanced" if use_ai else "Rule-based")
         
+        # Pre-flight token/cost estimate, before anything is sent to the API
+        if use_ai and ai_available:
+            upper, expected = estimate_ai_batch(len(sources), st.session_state.selected_course_code, selected_model)
+            col1, col2, col3 = st.columns(3)
+            if expected is not None:
+                col1.metric("Expected Tokens", f"{expected['prompt_tokens'] + expected['completion_tokens']:,.0f}")
+                col2.metric("Expected Cost", f"${expected['cost_usd']:.4f}")
+            col3.metric("Max Cost", f"${upper['cost_usd']:.4f}",
+                        help=f"{upper['calls']} AI calls at most ({AI_MAX_CHUNKS} chunks × {AI_CHUNK_TOKENS} tokens per file)")
+            st.caption("💰 ประมาณการจากราคาใน AI_PRICING · ค่าคาดการณ์คำนวณจากประวัติการใช้งานของรายวิชาและโมเดลนี้ · "
+                       "ไฟล์ที่เคยวิเคราะห์แล้วจะใช้ผลจากแคชโดยไม่เสียค่าใช้จ่าย")
+        
         # Process files button
         if st.button("🔍 Analyze All Files", type="primary", use_container_width=True):
-            with st.spinner(f"Processing {len(uploaded_files)} files..."):
+            with st.spinner(f"Processing {len(sources)} files..."):
                 # Progress tracking
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 
-                # Store individual assessments
-                file_assessments = []
-                engine = MultiLevelAssessmentEngine()
+                # Without AI each file is scored and handed to the aggregator before the next one is read
+                aggregator = MultiFileAggregator(st.session_state.get('scoring_mode', 'rule'))
+                file_assessments = aggregator.file_assessments
+                failed_files = list(archive_failures)
+                engine = aggregator.engine
+                ai_batch = use_ai and check_ai_availability()
                 
-                # Process each file
-                for i, uploaded_file in enumerate(uploaded_files):
+                def score_document(file_name, document, content_hash, ai_analysis=None):
+                    """Multi-level analysis of one extracted file"""
+                    # Check if AI analysis actually succeeded
+                    if ai_analysis and not ai_analysis.get('ai_generated', False):
+                        ai_analysis = None  # Reset to None if it was mock analysis
+                    results = engine.calculate_multi_level_alignment(
+                        document, 
+                        st.session_state.selected_course_code, 
+                        ai_analysis,
+                        content_hash=content_hash
+                    )
+                    # Add file name to results
+                    results['file_name'] = file_name
+                    return results
+                
+                # With AI, files are kept until their analysis arrives so the whole batch's calls run concurrently
+                extracted = []
+                for i, source in enumerate(sources):
                     # Update progress
-                    progress = (i + 1) / len(uploaded_files)
+                    progress = (i + 1) / len(sources)
                     progress_bar.progress(progress)
-                    status_text.text(f"Processing file {i+1}/{len(uploaded_files)}: {uploaded_file.name}")
+                    status_text.text(f"Processing file {i+1}/{len(sources)}: {source.name}")
                     
-                    # Extract content
-                    content = extract_text_from_file(uploaded_file)
+                    # Ingest once, then extract - a failing file is recorded and the batch continues
+                    try:
+                        upload = ingest_source(source)
+                    except ValueError as e:
+                        failed_files.append(ExtractionError('invalid', str(e), source.name).to_dict())
+                        continue
                     
-                    # AI Analysis (if enabled)
-                    ai_analysis = None
-                    if use_ai:
-                        content_hash = hashlib.md5(content.encode()).hexdigest()
-                        ai_analysis = generate_ai_analysis(content_hash, st.session_state.selected_course_code, use_ai, selected_model)
-                        # Check if AI analysis actually succeeded
-                        if ai_analysis and not ai_analysis.get('ai_generated', False):
-                            ai_analysis = None  # Reset to None if it was mock analysis
+                    with upload:
+                        content_hash = upload.sha256
+                        try:
+                            document = extract_document_from_file(upload)
+                        except ExtractionError as e:
+                            failed_files.append(e.to_dict())
+                            continue
                     
-                    # Multi-level analysis
-                    results = engine.calculate_multi_level_alignment(
-                        content, 
-                        st.session_state.selected_course_code, 
-                        ai_analysis
-                    )
+                    if ai_batch:
+                        extracted.append((source.name, document, content_hash))
+                    else:
+                        aggregator.add_assessment(score_document(source.name, document, content_hash))
+                
+                # AI Analysis (if enabled) - up to AI_MAX_CONCURRENCY calls in flight, each file scored and
+                # its Document released as soon as its analysis arrives
+                if extracted:
+                    file_results = [None] * len(extracted)
+                    completed = 0
+                    added = 0
                     
-                    # Add file name to results
-                    results['file_name'] = uploaded_file.name
-                    file_assessments.append(results)
+                    def on_analysis(index, ai_analysis):
+                        nonlocal completed, added
+                        file_name, document, content_hash = extracted[index]
+                        extracted[index] = None
+                        file_results[index] = score_document(file_name, document, content_hash, ai_analysis)
+                        # Keep upload order: hand over every result whose predecessors are all in
+                        while added < len(file_results) and file_results[added] is not None:
+                            aggregator.add_assessment(file_results[added])
+                            file_results[added] = None
+                            added += 1
+                        completed += 1
+                        progress_bar.progress(completed / len(file_results))
+                        status_text.text(f"🤖 AI analysis {completed}/{len(file_results)}: {file_name}")
+                    
+                    # A generator, so the job list does not hold on to the Documents
+                    generate_ai_analyses(((index, entry[2], entry[1]) for index, entry in enumerate(extracted)),
+                                         st.session_state.selected_course_code, selected_model, on_result=on_analysis)
                 
                 # Clear progress indicators
                 progress_bar.empty()
                 status_text.empty()
                 
+                st.session_state.failed_files = failed_files
+                if failed_files:
+                    st.warning(f"⚠️ ไม่สามารถสกัดข้อความได้ {len(failed_files)} ไฟล์ (ไม่นำมาคำนวณผลรวม)")
+                    st.dataframe(pd.DataFrame(failed_files).rename(columns={
+                        'file_name': 'File Name', 'kind': 'Error Type', 'message': 'Details'
+                    }), use_container_width=True, hide_index=True)
+                
+                if not file_assessments:
+                    st.error("❌ ไม่มีไฟล์ที่วิเคราะห์ได้")
+                    return None, None
+                
                 # Store results in session state
                 st.session_state.file_assessments = file_assessments
                 st.session_state.analysis_mode = 'multiple'
                 
                 # Aggregate results
-                aggregator = MultiFileAggregator()
-                aggregated_results = aggregator.aggregate_assessments(file_assessments)
+                aggregated_results = aggregator.aggregate_assessments()
                 st.session_state.aggregated_results = aggregated_results
                 
-                st.success(f"✅ Successfully analyzed {len(uploaded_files)} files!")
+                st.success(f"✅ Successfully analyzed {len(file_assessments)} files!")
                 
                 # Add note about AI analysis status
                 if use_ai:
                     # Check how many files actually used AI
-                    ai_success_count = sum(1 for f in file_assessments if f.get('ai_enhanced', False))
+                    ai_success_count = sum(1 for f in file_assessments if f.ai_enhanced)
                     if ai_success_count == 0:
                         st.warning("⚠️ AI analysis failed for all files due to API quota. Using rule-based analysis instead.")
                     elif ai_success_count < len(file_assessments):
@@ -2231,6 +2663,47 @@ def show_multiple_file_upload_interface():
     return None, None
 
 # Main Application
+def display_ai_cache_status():
+    """Sidebar hit/miss counters of the AI response cache, with manual invalidation"""
+    cache = get_llm_cache()
+    with st.sidebar:
+        st.markdown("**🗄️ AI Response Cache**")
+        if st.button("🗑️ ล้างแคช AI", key="clear_ai_cache", help="ลบผลวิเคราะห์ AI ที่บันทึกไว้ทั้งหมด"):
+            st.success(f"ลบผลวิเคราะห์ที่บันทึกไว้ {cache.invalidate()} รายการ")
+        
+        stats = cache.stats()
+        col1, col2 = st.columns(2)
+        col1.metric("Hits", stats['memory_hits'] + stats['disk_hits'])
+        col2.metric("Misses", stats['misses'])
+        st.caption(f"Memory {stats['memory_hits']} · SQLite {stats['disk_hits']} · "
+                   f"hit rate {stats['hit_rate'] * 100:.0f}% · {stats['entries']} stored · "
+                   f"prompt v{AI_PROMPT_VERSION}")
+
+def display_ai_usage_report():
+    """Logged AI calls, tokens and estimated cost grouped by course, assessor, day or model"""
+    ledger = get_usage_ledger()
+    with st.expander("💰 AI Usage & Cost"):
+        groupings = {'day': 'รายวัน', 'course': 'รายวิชา', 'assessor': 'ผู้ประเมิน', 'model': 'โมเดล'}
+        group_by = st.radio("จัดกลุ่มตาม:", list(groupings), format_func=groupings.get,
+                            horizontal=True, key="ai_usage_group_by")
+        summary = ledger.summary(group_by)
+        if not summary:
+            st.info("ยังไม่มีการเรียกใช้ AI ที่บันทึกไว้")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("API Calls", sum(row['api_calls'] for row in summary))
+        col2.metric("Cache Hits", sum(row['cache_hits'] for row in summary))
+        col3.metric("Total Tokens", f"{sum(row['total_tokens'] for row in summary):,}")
+        col4.metric("Estimated Cost", f"${sum(row['cost_usd'] for row in summary):.4f}")
+        
+        usage_df = pd.DataFrame(summary)
+        if group_by == 'assessor':
+            usage_df['assessor'] = usage_df['assessor'].replace('', 'ไม่ระบุ')
+        usage_df['cost_usd'] = usage_df['cost_usd'].round(4)
+        usage_df['avg_latency_ms'] = usage_df['avg_latency_ms'].round(0)
+        st.dataframe(usage_df, use_container_width=True, hide_index=True)
+
 def main():
     st.set_page_config(
         page_title="Multi-File Assessment System",
@@ -2320,6 +2793,23 @@ def main():
         
         st.session_state.selected_course_code = course_options[selected_course_display]
         
+        auto_detect_course = st.checkbox(
+            "🔎 ตรวจหารายวิชาอัตโนมัติจากเนื้อหา",
+            value=False,
+            help="ให้คะแนนเนื้อหากับทุกรายวิชาในการสแกนครั้งเดียว แล้วประเมินด้วยรายวิชาที่ตรงที่สุด",
+            key="auto_detect_course"
+        )
+        
+        scoring_mode = st.radio(
+            "วิธีให้คะแนน CLO:",
+            options=list(SCORING_MODES),
+            format_func=SCORING_MODES.get,
+            horizontal=True,
+            help="BM25 คำนึงถึงความถี่ของคำและความเฉพาะของคำในคลังเอกสารของหลักสูตร; "
+                 "Semantic เทียบความหมายกับคำอธิบาย CLO/YLO แบบออฟไลน์ (ไม่ใช้เครือข่าย)",
+            key="scoring_mode"
+        )
+        
         # Display course information
         course_info = COURSE_DESCRIPTIONS[st.session_state.selected_course_code]
         
@@ -2356,8 +2846,8 @@ def main():
             
             uploaded_file = st.file_uploader(
                 "Choose your slide file",
-                type=['pdf', 'pptx', 'ppt', 'txt'],
-                help="Supported formats: PDF, PowerPoint, Text files"
+                type=supported_suffixes() + ['txt'],
+                help="Supported formats: PDF, PowerPoint (.pptx), Word, OpenDocument, Markdown, HTML, Text files"
             )
             
             # AI Analysis option
@@ -2388,7 +2878,7 @@ def main():
             
             if uploaded_file is not None:
                 # File information
-                file_size = len(uploaded_file.getvalue()) / (1024 * 1024)
+                file_size = uploaded_file.size / (1024 * 1024)
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -2410,52 +2900,75 @@ def main():
                         progress_bar.progress(25)
                         time.sleep(0.5)
                         
-                        content = extract_text_from_file(uploaded_file)
-                        
-                        # Step 2: AI Analysis (if enabled)
-                        ai_analysis = None
-                        if use_ai:
-                            status_text.text("🤖 Performing AI analysis...")
-                            progress_bar.progress(50)
-                            time.sleep(1)
-                            
-                            content_hash = hashlib.md5(content.encode()).hexdigest()
-                            ai_analysis = generate_ai_analysis(content_hash, st.session_state.selected_course_code, use_ai, selected_model)
-                            # Check if AI analysis actually succeeded
-                            if ai_analysis and not ai_analysis.get('ai_generated', False):
-                                ai_analysis = None  # Reset to None if it was mock analysis
-                        
-                        # Step 3: Multi-level analysis
-                        status_text.text("🎯 Performing multi-level assessment...")
-                        progress_bar.progress(75)
-                        time.sleep(0.5)
-                        
-                        engine = MultiLevelAssessmentEngine()
-                        results = engine.calculate_multi_level_alignment(
-                            content, 
-                            st.session_state.selected_course_code, 
-                            ai_analysis
-                        )
-                        
-                        # Step 4: Complete
-                        status_text.text("✅ Analysis complete!")
-                        progress_bar.progress(100)
-                        time.sleep(0.5)
+                        try:
+                            with ingest_upload(uploaded_file) as upload:
+                                content_hash = upload.sha256
+                                document = extract_document_from_file(upload)
+                        except ExtractionError as e:
+                            document = None
+                            st.error(f"❌ ไม่สามารถสกัดข้อความจาก {uploaded_file.name} ({e.kind}): {e.message}")
                         
-                        # Clear progress indicators
-                        progress_bar.empty()
-                        status_text.empty()
-                        
-                        # Store results in session state
-                        st.session_state.analysis_results = results
-                        st.session_state.slide_content = content
-                        st.session_state.analysis_mode = 'single'
-                        
-                        # Show success message
-                        if ai_analysis is not None:
-                            st.success(f"✅ File processed with AI analysis! Assessment ID: {results.get('assessment_id', 'Unknown')}")
+                        if document is None:
+                            progress_bar.empty()
+                            status_text.empty()
                         else:
-                            st.success(f"✅ File processed with rule-based analysis! Assessment ID: {results.get('assessment_id', 'Unknown')}")
+                            engine = MultiLevelAssessmentEngine(scoring_mode)
+                            
+                            # Optional: pick the course from the content (one scan scores every course);
+                            # the detected course is kept in the results, the course selector is left as is
+                            course_code = st.session_state.selected_course_code
+                            course_ranking = None
+                            if auto_detect_course:
+                                course_ranking = engine.rank_courses(document)
+                                course_code = course_ranking[0]['course_code']
+                            
+                            # Step 2: AI Analysis (if enabled)
+                            ai_analysis = None
+                            if use_ai:
+                                status_text.text("🤖 Performing AI analysis...")
+                                progress_bar.progress(50)
+                                time.sleep(1)
+                                
+                                ai_analysis = generate_ai_analysis(content_hash, course_code, use_ai, selected_model, content=document)
+                                # Check if AI analysis actually succeeded
+                                if ai_analysis and not ai_analysis.get('ai_generated', False):
+                                    ai_analysis = None  # Reset to None if it was mock analysis
+                            
+                            # Step 3: Multi-level analysis
+                            status_text.text("🎯 Performing multi-level assessment...")
+                            progress_bar.progress(75)
+                            time.sleep(0.5)
+                            
+                            results = engine.calculate_multi_level_alignment(
+                                document, 
+                                course_code, 
+                                ai_analysis,
+                                content_hash=content_hash
+                            )
+                            
+                            # Step 4: Complete
+                            status_text.text("✅ Analysis complete!")
+                            progress_bar.progress(100)
+                            time.sleep(0.5)
+                            
+                            # Clear progress indicators
+                            progress_bar.empty()
+                            status_text.empty()
+                            
+                            # Store results in session state
+                            st.session_state.analysis_results = results
+                            st.session_state.analysis_document = document
+                            st.session_state.slide_content = document.text
+                            st.session_state.analysis_mode = 'single'
+                            
+                            # Show success message
+                            if ai_analysis is not None:
+                                st.success(f"✅ File processed with AI analysis! Assessment ID: {results.get('assessment_id', 'Unknown')}")
+                            else:
+                                st.success(f"✅ File processed with rule-based analysis! Assessment ID: {results.get('assessment_id', 'Unknown')}")
+                            
+                            if course_ranking:
+                                display_course_ranking(course_ranking)
             
             st.markdown('</div>', unsafe_allow_html=True)
             
@@ -2496,6 +3009,8 @@ def main():
                 height=400,
                 help="วางเนื้อหาของคุณที่นี่เพื่อวิเคราะห์"
             )
+            # Hashed once: shown below, then used for the AI cache and the assessment
+            content_hash = hashlib.md5(content.encode()).hexdigest()
             
             # AI Analysis option for text input
             col1, col2, col3 = st.columns([2, 2, 1])
@@ -2521,7 +3036,6 @@ def main():
             with col3:
                 # Show content hash preview
                 if content.strip():
-                    content_hash = hashlib.md5(content.encode()).hexdigest()
                     st.info(f"🔒 Hash: `{content_hash[:8]}...`")
             
             st.markdown('</div>', unsafe_allow_html=True)
@@ -2537,17 +3051,28 @@ def main():
                         # Step 1: Generate unique ID
                         status_text.text("🆔 Generating unique assessment ID...")
                         progress_bar.progress(15)
-                        time.sleep(0.3)
+                        
+                        # Initialize assessment engine; only paragraphs edited since the last run are rescanned
+                        engine = MultiLevelAssessmentEngine(scoring_mode)
+                        if 'text_analyzer' not in st.session_state:
+                            st.session_state.text_analyzer = IncrementalTextAnalyzer(engine.tokenizer, engine.model.automaton)
+                        document = engine.analyze_text_incrementally(st.session_state.text_analyzer, content)
+                        
+                        # Optional: pick the course from the content (one scan scores every course);
+                        # the detected course is kept in the results, the course selector is left as is
+                        course_code = st.session_state.selected_course_code
+                        course_ranking = None
+                        if auto_detect_course:
+                            course_ranking = engine.rank_courses(document)
+                            course_code = course_ranking[0]['course_code']
                         
                         # Step 2: AI Analysis (if enabled)
                         ai_analysis = None
                         if use_ai:
                             status_text.text("🤖 Performing AI analysis...")
                             progress_bar.progress(35)
-                            time.sleep(0.5)
                             
-                            content_hash = hashlib.md5(content.encode()).hexdigest()
-                            ai_analysis = generate_ai_analysis(content_hash, st.session_state.selected_course_code, use_ai, selected_model)
+                            ai_analysis = generate_ai_analysis(content_hash, course_code, use_ai, selected_model, content=document)
                             # Check if AI analysis actually succeeded
                             if ai_analysis and not ai_analysis.get('ai_generated', False):
                                 ai_analysis = None  # Reset to None if it was mock analysis
@@ -2555,22 +3080,18 @@ def main():
                         # Step 3: Multi-level analysis
                         status_text.text("🎯 Performing multi-level assessment...")
                         progress_bar.progress(60)
-                        time.sleep(0.5)
-                        
-                        # Initialize assessment engine
-                        engine = MultiLevelAssessmentEngine()
                         
                         # Perform multi-level analysis
                         results = engine.calculate_multi_level_alignment(
-                            content, 
-                            st.session_state.selected_course_code, 
-                            ai_analysis
+                            document, 
+                            course_code, 
+                            ai_analysis,
+                            content_hash=content_hash
                         )
                         
                         # Step 4: Complete
                         status_text.text("✅ Analysis complete!")
                         progress_bar.progress(100)
-                        time.sleep(0.5)
                         
                         # Clear progress indicators
                         progress_bar.empty()
@@ -2578,6 +3099,7 @@ def main():
                         
                         # Store results in session state
                         st.session_state.analysis_results = results
+                        st.session_state.analysis_document = document
                         st.session_state.slide_content = content
                         st.session_state.analysis_mode = 'single'
                         
@@ -2588,6 +3110,12 @@ def main():
                         else:
                             st.success(f"✅ การวิเคราะห์แบบ Rule-based เสร็จสมบูรณ์! Assessment ID: `{assessment_id}`")
                         
+                        if course_ranking:
+                            display_course_ranking(course_ranking)
+                        
+                        stats = st.session_state.text_analyzer.last_stats
+                        st.caption(f"♻️ วิเคราะห์ใหม่ {stats['rescanned']} จาก {stats['paragraphs']} ย่อหน้า (ย่อหน้าที่ไม่เปลี่ยนใช้ผลเดิม)")
+                        
                         # Show content hash
                         content_hash = results.get('content_hash', '')
                         if content_hash:
@@ -2598,7 +3126,8 @@ def main():
         # Display results if available
         if results:
             st.markdown("---")
-            create_multi_level_dashboard(results, key_prefix="single_tab1")
+            create_multi_level_dashboard(results, key_prefix="single_tab1",
+                                         document=st.session_state.get('analysis_document'))
             
             # Recommendations
             st.markdown("---")
@@ -2635,7 +3164,8 @@ def main():
         if hasattr(st.session_state, 'analysis_mode'):
             if st.session_state.analysis_mode == 'single' and hasattr(st.session_state, 'analysis_results'):
                 st.subheader("📊 Single File Analysis Results")
-                create_multi_level_dashboard(st.session_state.analysis_results, key_prefix="tab3_single")
+                create_multi_level_dashboard(st.session_state.analysis_results, key_prefix="tab3_single",
+                                             document=st.session_state.get('analysis_document'))
             elif st.session_state.analysis_mode == 'multiple' and hasattr(st.session_state, 'aggregated_results'):
                 st.subheader("📊 Multi-File Aggregated Results")
                 create_multi_file_dashboard(st.session_state.aggregated_results, key_prefix="tab3")
@@ -2645,16 +3175,19 @@ def main():
                     st.markdown("---")
                     st.subheader("📄 Individual File Results")
                     
-                    file_names = [f['file_name'] for f in st.session_state.file_assessments]
+                    file_names = [f.file_name for f in st.session_state.file_assessments]
                     selected_file = st.selectbox("Select file to view details:", file_names)
                     
-                    # Find and display selected file results
+                    # Find and display selected file results - expanded from the compact record on demand
                     for i, assessment in enumerate(st.session_state.file_assessments):
-                        if assessment['file_name'] == selected_file:
-                            create_multi_level_dashboard(assessment, key_prefix=f"tab3_multi_{i}")
+                        if assessment.file_name == selected_file:
+                            create_multi_level_dashboard(MultiLevelAssessmentEngine().expand_results(assessment),
+                                                         key_prefix=f"tab3_multi_{i}")
                             break
         else:
             st.info("ยังไม่มีผลการวิเคราะห์ กรุณาทำการประเมินในแท็บ 'การประเมิน' หรือ 'วิเคราะห์หลายไฟล์'")
+        
+        display_ai_usage_report()
     
     with tab4:
         # Program Overview Section
@@ -2777,6 +3310,8 @@ def main():
             st.write("• Improvement Metrics")
         
         st.markdown('</div>', unsafe_allow_html=True)
+    
+    display_ai_cache_status()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import app
+from utils.batch_scoring import score_batch
+from utils.document import as_document
+
+def _documents(course_data, rng, count=50):
+    vocabulary = [keyword for keywords in course_data['keywords'].values() for keyword in keywords]
+    vocabulary += " ".join(course_data['clo'].values()).split() + ['foo', 'bar', 'ข้อมูล']
+    return [" ".join(rng.sample(vocabulary, rng.randint(0, min(len(vocabulary), 30)))) for _ in range(count)]
+
+def _ai_analysis(course_data, rng):
+    if rng.random() < 0.5:
+        return None
+    return {
+        'ai_generated': True,
+        'content_analysis': {
+            clo_code: {'score': rng.choice([rng.randint(40, 100), round(rng.uniform(40, 100), 2), 72.25]),
+                       'confidence': round(rng.uniform(0.5, 1), 3), 'ai_insights': []}
+            for clo_code in course_data['clo'] if rng.random() < 0.7
+        }
+    }
+
+@pytest.mark.parametrize('course_code', sorted(app.COURSE_DESCRIPTIONS))
+def test_score_batch_matches_per_document_scoring(course_code):
+    engine = app.MultiLevelAssessmentEngine()
+    course_data = app.COURSE_DESCRIPTIONS[course_code]
+    rng = random.Random(course_code)
+    documents = [as_document(text) for text in _documents(course_data, rng)]
+    ai_analyses = [_ai_analysis(course_data, rng) for _ in documents]
+
+    batch = score_batch(engine.model.courses[course_code],
+                        [engine.find_course_terms(document) for document in documents], ai_analyses)
+
+    for row, (document, ai_analysis) in enumerate(zip(documents, ai_analyses)):
+        clo_results = engine.calculate_clo_alignment(document, course_code, ai_analysis)
+        assert list(batch.clo_scores[row]) == [clo_results[code]['score'] for code in batch.clo_codes]
+        assert list(batch.clo_confidence[row]) == [clo_results[code]['confidence'] for code in batch.clo_codes]
+
+        results = engine.calculate_multi_level_alignment(document, course_code, ai_analysis)
+        assert list(batch.plo_scores[row]) == [results['plo_results'][code]['score'] for code in batch.plo_codes]
+        assert list(batch.ylo_scores[row]) == [results['ylo_results'][code]['score'] for code in batch.ylo_codes]
+        assert list(batch.ylo_confidence[row]) == [results['ylo_results'][code]['confidence']
+                                                   for code in batch.ylo_codes]
+        overall = results['overall_scores']
+        assert [batch.clo_average[row], batch.plo_average[row], batch.ylo_average[row],
+                batch.overall_confidence[row]] == [overall['clo_average'], overall['plo_average'],
+                                                   overall['ylo_average'], overall['overall_confidence']]
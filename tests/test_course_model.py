@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+import app
+from utils.course_model import COGNITIVE_WEIGHTS, PLO_EMPHASIS_TERMS, PLO_RELATED_TERMS
+from utils.document import Document
+
+def _occurs(tokens, pattern):
+    return any(tuple(tokens[position:position + len(pattern)]) == pattern
+               for position in range(len(tokens) - len(pattern) + 1))
+
+def _reference_clo_scores(engine, slides, course_code):
+    """Rule-based CLO scores straight from COURSE_DESCRIPTIONS, matching each slide on its own"""
+    course_data = app.COURSE_DESCRIPTIONS[course_code]
+    slide_tokens = [engine.tokenizer.tokenize(slide) for slide in slides]
+    scores = {}
+    for clo_code, description in course_data['clo'].items():
+        keywords = course_data['keywords'].get(clo_code, [])
+        found = [keyword for keyword in keywords
+                 if any(_occurs(tokens, tuple(engine.tokenizer.tokenize(keyword))) for tokens in slide_tokens)]
+        terms = engine.tokenizer.content_terms(description)
+        desc_matches = sum(1 for term in terms if any(term in tokens for tokens in slide_tokens))
+        score = min(100, 50 + len(found) / len(keywords) * 40 + min(desc_matches * 2, 10)) if keywords else 50
+        scores[clo_code] = (round(score, 1), found)
+    return scores
+
+def _slides(course_data, rng):
+    vocabulary = " ".join(keyword for keywords in course_data['keywords'].values() for keyword in keywords).split()
+    vocabulary += " ".join(course_data['clo'].values()).split() + ['intro', 'overview', 'ข้อมูล']
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 25))) for _ in range(rng.randint(1, 6))]
+
+@pytest.mark.parametrize('course_code', sorted(app.COURSE_DESCRIPTIONS))
+def test_clo_scores_match_reference_matcher(course_code):
+    engine = app.MultiLevelAssessmentEngine()
+    rng = random.Random(f"clo-{course_code}")
+    for _ in range(300 // len(app.COURSE_DESCRIPTIONS)):
+        slides = _slides(app.COURSE_DESCRIPTIONS[course_code], rng)
+        clo_results = engine.calculate_clo_alignment(Document.from_sections(slides), course_code)
+        expected = _reference_clo_scores(engine, slides, course_code)
+        assert {code: (result['score'], result['found_keywords'])
+                for code, result in clo_results.items()} == expected
+
+@pytest.mark.parametrize('course_code', sorted(app.COURSE_DESCRIPTIONS))
+def test_compiled_course_matches_configuration(course_code):
+    engine = app.MultiLevelAssessmentEngine()
+    course_data = app.COURSE_DESCRIPTIONS[course_code]
+    course = engine.model.courses[course_code]
+
+    assert course.name == course_data['name']
+    assert [(clo.code, clo.description, list(clo.keywords)) for clo in course.clos] == [
+        (code, description, course_data['keywords'].get(code, [])) for code, description in course_data['clo'].items()
+    ]
+
+    assert [plo.code for plo in course.plo_links] == course_data.get('plo_mapping', [])
+    for plo in course.plo_links:
+        related = [code for code in course_data['clo']
+                   if set(course_data['keywords'].get(code, [])) & set(PLO_RELATED_TERMS.get(plo.code, []))]
+        assert list(plo.related_clos) == (related or list(course_data['clo']))
+        assert list(plo.clo_weights) == [
+            1.2 if set(course_data['keywords'].get(code, [])) & set(PLO_EMPHASIS_TERMS.get(plo.code, [])) else 1.0
+            for code in plo.related_clos
+        ]
+
+    assert [ylo.code for ylo in course.ylos] == course_data.get('ylo_mapping', [])
+    for ylo in course.ylos:
+        ylo_data = app.YLO_STRUCTURE[ylo.code]
+        assert (ylo.description, ylo.level, list(ylo.related_plos)) == (
+            ylo_data['description'], ylo_data['level'], ylo_data['plo_mapping'])
+        assert ylo.cognitive_multiplier == COGNITIVE_WEIGHTS.get(ylo_data['cognitive_level'], 1.0)
+
+def test_compiled_model_is_read_only():
+    engine = app.MultiLevelAssessmentEngine()
+    assert dict(engine.model.plo_weights) == {code: plo['weight'] / 100 for code, plo in app.ENHANCED_PLOS.items()}
+    with pytest.raises(TypeError):
+        engine.model.courses['new'] = None
+    with pytest.raises(ValueError):
+        engine.model.courses['282711'].propagation.clo_plo[0, 0] = 5
@@ -0,0 +1,28 @@
+from utils.extraction_cache import ExtractionCache
+
+DIGEST = "ab" * 32
+
+def test_key_depends_on_kind_and_version():
+    keys = {ExtractionCache.make_key(DIGEST, version, kind)
+            for version in ("1", "2") for kind in ("markdown", "html", "pdf")}
+    assert len(keys) == 6
+
+def test_same_bytes_as_markdown_and_html_keep_separate_entries(tmp_path):
+    cache = ExtractionCache(tmp_path)
+    cache.put(ExtractionCache.make_key(DIGEST, "2", "markdown"), ["# Title"])
+    assert cache.get(ExtractionCache.make_key(DIGEST, "2", "html")) is None
+    assert cache.get(ExtractionCache.make_key(DIGEST, "2", "markdown")) == ["# Title"]
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ExtractionCache(tmp_path)
+    key = ExtractionCache.make_key(DIGEST, "2", "pdf")
+    cache.put(key, ["page"])
+    cache._path(key).write_bytes(b"not zlib")
+    assert cache.get(key) is None
+    assert not cache._path(key).exists()
+
+def test_eviction_keeps_the_cache_within_max_bytes(tmp_path):
+    cache = ExtractionCache(tmp_path, max_bytes=2000)
+    for index in range(20):
+        cache.put(ExtractionCache.make_key(f"{index:064x}", "2", "pdf"), [f"{index} " * 300 + str(index ** 7)])
+    assert sum(path.stat().st_size for path in tmp_path.glob('*/*.z')) <= 2000
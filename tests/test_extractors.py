@@ -0,0 +1,46 @@
+import io
+import zipfile
+
+import pytest
+
+from utils.extraction_worker import extract_document
+from utils.extractors import extractor_kind, supported_suffixes
+from utils.upload_ingest import list_archive_members
+
+class NamedBytes(io.BytesIO):
+    name = 'course.zip'
+
+def test_legacy_ppt_is_not_routed_to_the_pptx_extractor():
+    assert extractor_kind('week1.ppt') is None
+    assert extractor_kind('week1.bin', 'application/vnd.ms-powerpoint') is None
+    assert 'ppt' not in supported_suffixes()
+    assert extractor_kind('week1.pptx') == 'pptx'
+
+def test_archive_skips_legacy_ppt_members():
+    buffer = NamedBytes()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('week1.ppt', b'\xd0\xcf\x11\xe0')
+        archive.writestr('week2.pdf', b'%PDF-1.4')
+    buffer.seek(0)
+    assert [member.name for member in list_archive_members(buffer)] == ['course.zip/week2.pdf']
+
+def test_markdown_splits_at_headings_and_slide_breaks():
+    text = (
+        "---\ntitle: deck\n---\n# Climate\n- **GIS** and [remote sensing](http://x)\n\n---\n"
+        "Second slide ![map](m.png)\n```\n# not a heading\n```\n## Water\nbody\n"
+    )
+    sections, stats = extract_document('markdown', text.encode())
+    assert sections == ["Climate\nGIS and remote sensing", "Second slide map\n# not a heading", "Water\nbody"]
+    assert stats == {'sections': 3}
+
+def test_html_sections_skip_scripts_and_honour_charset():
+    html = ('<html><head><meta charset="tis-620"><script>var x = 1;</script></head><body>'
+            '<h1>ภูมิอากาศ</h1><p>GIS &amp; data</p><section><p>second</p></section></body></html>')
+    sections, _ = extract_document('html', html.encode('tis-620'))
+    assert sections == ["ภูมิอากาศ\nGIS & data", "second"]
+
+@pytest.mark.parametrize('kind', ['pdf', 'pptx', 'docx', 'odp', 'markdown', 'html'])
+def test_empty_upload_is_an_empty_document(kind):
+    sections, stats = extract_document(kind, b"")
+    assert sections == []
+    assert stats.get('sections', stats.get('pages')) == 0
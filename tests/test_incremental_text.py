@@ -0,0 +1,48 @@
+import random
+
+import app
+from utils.incremental_text import IncrementalTextAnalyzer, paragraph_document
+
+PARAGRAPHS = [
+    "intro climate", "system overview", "climate system and GIS", "remote sensing for planning",
+    "การวางแผนพัฒนาชนบท", "การมีส่วนร่วมของชุมชน", "ภูมิศาสตร์ สิ่งแวดล้อม", "spatial data analysis"
+]
+
+def _rescan(engine, text):
+    document = paragraph_document(text)
+    return engine.tokenize_document(document), engine.find_course_terms(document)
+
+def test_incremental_hits_equal_full_rescan_after_edits():
+    engine = app.MultiLevelAssessmentEngine()
+    analyzer = IncrementalTextAnalyzer(engine.tokenizer, engine.model.automaton)
+    rng = random.Random(18)
+    paragraphs = []
+    for _ in range(60):
+        # Insert, delete or rewrite a paragraph, then compare with scoring the text from scratch
+        action = rng.choice(['insert', 'insert', 'delete', 'edit']) if paragraphs else 'insert'
+        position = rng.randint(0, max(0, len(paragraphs) - 1))
+        if action == 'insert':
+            paragraphs.insert(position, rng.choice(PARAGRAPHS))
+        elif action == 'delete':
+            del paragraphs[position]
+        else:
+            paragraphs[position] += " " + rng.choice(PARAGRAPHS)
+        text = "\n\n".join(paragraphs)
+
+        document, stream, hits = analyzer.update(text)
+        full_stream, full_hits = _rescan(engine, text)
+        assert document.text == paragraph_document(text).text
+        assert stream.tokens == full_stream.tokens
+        assert list(stream.slide_offsets) == list(full_stream.slide_offsets)
+        assert hits.positions == full_hits.positions
+
+def test_paragraph_break_stops_a_match():
+    engine = app.MultiLevelAssessmentEngine()
+    analyzer = IncrementalTextAnalyzer(engine.tokenizer, engine.model.automaton)
+    pattern_id = next(pattern_id for clo in engine.model.courses['282711'].clos
+                      for keyword, pattern_id in zip(clo.keywords, clo.keyword_ids) if keyword == 'climate system')
+    _, _, hits = analyzer.update("intro climate\n\nsystem overview")
+    _, full_hits = _rescan(engine, "intro climate\n\nsystem overview")
+    assert hits.count(pattern_id) == full_hits.count(pattern_id) == 0
+    _, _, hits = analyzer.update("intro climate system overview")
+    assert hits.count(pattern_id) == 1
@@ -0,0 +1,36 @@
+import random
+
+import app
+from utils.document import Document
+from utils.keyword_automaton import KeywordAutomaton
+
+PATTERNS = [('climate', 'system'), ('system',), ('gis',), ('remote', 'sensing'), ('a', 'b', 'a')]
+
+def _brute_force(tokens, boundaries):
+    """Pattern id -> start positions of occurrences lying inside one segment"""
+    cuts = sorted({0, len(tokens)} | set(boundaries))
+    found = {pattern_id: [] for pattern_id in range(len(PATTERNS))}
+    for segment_start, segment_end in zip(cuts, cuts[1:]):
+        for position in range(segment_start, segment_end):
+            for pattern_id, pattern in enumerate(PATTERNS):
+                if tuple(tokens[position:min(position + len(pattern), segment_end)]) == pattern:
+                    found[pattern_id].append(position)
+    return found
+
+def test_scan_matches_brute_force_within_segments():
+    automaton = KeywordAutomaton(PATTERNS)
+    rng = random.Random(8)
+    vocabulary = ['climate', 'system', 'gis', 'remote', 'sensing', 'a', 'b', 'other']
+    for _ in range(200):
+        tokens = [rng.choice(vocabulary) for _ in range(rng.randint(0, 40))]
+        boundaries = sorted(rng.sample(range(len(tokens) + 1), rng.randint(0, min(5, len(tokens) + 1))))
+        hits = automaton.scan(tokens, boundaries=boundaries)
+        expected = _brute_force(tokens, boundaries)
+        assert {pattern_id: hits.positions[pattern_id] for pattern_id in expected} == expected
+
+def test_keywords_do_not_match_across_slides():
+    engine = app.MultiLevelAssessmentEngine()
+    split = engine.calculate_clo_alignment(Document.from_sections(["intro climate", "system overview"]), '282711')
+    joined = engine.calculate_clo_alignment(Document.from_sections(["intro climate system overview"]), '282711')
+    assert 'climate system' not in split['CLO1']['found_keywords']
+    assert 'climate system' in joined['CLO1']['found_keywords']
@@ -0,0 +1,52 @@
+from utils import llm_cache
+from utils.llm_cache import LLMResponseCache
+
+ANALYSIS = {'content_analysis': {'CLO1': {'score': 80, 'confidence': 0.9, 'ai_insights': ['ภูมิอากาศ']}}}
+
+def test_get_returns_a_fresh_copy_and_counts_hits(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+    assert cache.get('hash', '282711', 'gpt-4o-mini', '2') is None
+    cache.put('hash', '282711', 'gpt-4o-mini', '2', ANALYSIS)
+
+    first = cache.get('hash', '282711', 'gpt-4o-mini', '2')
+    assert first == ANALYSIS
+    first['content_analysis']['CLO1']['score'] = 0
+    assert cache.get('hash', '282711', 'gpt-4o-mini', '2') == ANALYSIS
+    assert cache.get('hash', '282712', 'gpt-4o-mini', '2') is None
+
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['misses'], stats['writes'], stats['entries']) == (2, 2, 1, 1)
+
+def test_entries_survive_a_restart(tmp_path):
+    LLMResponseCache(tmp_path / "llm.sqlite3").put('hash', '282711', 'gpt-4o-mini', '2', ANALYSIS)
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+    assert cache.get('hash', '282711', 'gpt-4o-mini', '2') == ANALYSIS
+    assert cache.stats()['disk_hits'] == 1
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3", max_memory_entries=2)
+    for index in range(3):
+        cache.put(f'hash{index}', '282711', 'gpt-4o-mini', '2', ANALYSIS)
+    assert cache.get('hash0', '282711', 'gpt-4o-mini', '2') == ANALYSIS
+    assert cache.stats()['disk_hits'] == 1
+
+def test_expired_entries_are_misses_and_purged(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3", ttl_seconds=60)
+    cache.put('hash', '282711', 'gpt-4o-mini', '2', ANALYSIS)
+    now[0] += 59
+    assert cache.get('hash', '282711', 'gpt-4o-mini', '2') == ANALYSIS
+    now[0] += 2
+    assert cache.get('hash', '282711', 'gpt-4o-mini', '2') is None
+    assert cache.purge_expired() == 1
+
+def test_invalidate_keeps_only_the_current_prompt_version(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3")
+    cache.put('hash', '282711', 'gpt-4o-mini', '1', ANALYSIS)
+    cache.put('hash', '282711', 'gpt-4o-mini', '2', ANALYSIS)
+    assert cache.invalidate(keep_prompt_version='2') == 1
+    assert cache.get('hash', '282711', 'gpt-4o-mini', '1') is None
+    assert cache.get('hash', '282711', 'gpt-4o-mini', '2') == ANALYSIS
+    assert cache.invalidate() == 1
+    assert cache.stats()['entries'] == 0
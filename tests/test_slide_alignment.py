@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+import app
+from utils.document import Document
+
+def _slides(course_data, rng):
+    # Slides end and start mid-phrase, so multi-token keywords often straddle a boundary
+    vocabulary = " ".join(keyword for keywords in course_data['keywords'].values() for keyword in keywords).split()
+    vocabulary += " ".join(course_data['clo'].values()).split() + ['intro', 'overview', 'ข้อมูล']
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(5, 120))]
+    cuts = sorted(rng.sample(range(1, len(words)), min(len(words) - 1, rng.randint(1, 12))))
+    return [" ".join(words[start:stop]) for start, stop in zip([0] + cuts, cuts + [len(words)])]
+
+@pytest.mark.parametrize('course_code', sorted(app.COURSE_DESCRIPTIONS))
+def test_range_scores_match_slide_range_scoring(course_code):
+    engine = app.MultiLevelAssessmentEngine()
+    rng = random.Random(f"slides-{course_code}")
+    for _ in range(40):
+        document = Document.from_sections(_slides(app.COURSE_DESCRIPTIONS[course_code], rng))
+        alignment = engine.slide_alignment(document, course_code)
+        for _ in range(10):
+            start = rng.randrange(len(document))
+            stop = rng.randint(start + 1, len(document))
+            scores, coverage = alignment.range_scores(start, stop)
+            clo_results = engine.calculate_clo_alignment(document, course_code, slide_range=(start, stop))
+            assert scores.tolist() == [clo_results[code]['score'] for code in alignment.clo_codes]
+            assert coverage.tolist() == [clo_results[code]['coverage'] for code in alignment.clo_codes]
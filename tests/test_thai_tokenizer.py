@@ -0,0 +1,37 @@
+import app
+from utils.document import Document
+from utils.thai_tokenizer import ThaiEnglishTokenizer, build_course_tokenizer, is_content_term
+
+def test_latin_words_are_lower_cased_and_plurals_folded():
+    tokenizer = ThaiEnglishTokenizer()
+    assert tokenizer.tokenize("GIS Tools, Climate Dynamics and glass 2024") == [
+        'gis', 'tool', 'climate', 'dynamic', 'and', 'glass', '2024']
+
+def test_thai_runs_use_the_longest_lexicon_words():
+    tokenizer = ThaiEnglishTokenizer()
+    assert tokenizer.tokenize("การจัดการทรัพยากรน้ำอย่างยั่งยืน") == ['การจัดการ', 'ทรัพยากรน้ำ', 'อย่างยั่งยืน']
+    assert tokenizer.tokenize("ระบบนิเวศและGISของชุมชน") == ['ระบบนิเวศ', 'และ', 'gis', 'ของ', 'ชุมชน']
+
+def test_course_keywords_segment_as_single_tokens():
+    tokenizer = build_course_tokenizer(app.COURSE_DESCRIPTIONS)
+    for course in app.COURSE_DESCRIPTIONS.values():
+        for keywords in course['keywords'].values():
+            for keyword in keywords:
+                if keyword.isalpha() and not keyword.isascii():
+                    assert tokenizer.tokenize(keyword) == [keyword]
+
+def test_content_terms_are_distinct_and_skip_stopwords():
+    tokenizer = ThaiEnglishTokenizer()
+    terms = tokenizer.content_terms("The climate and the climate of ชุมชน และ ชุมชน a GIS")
+    assert terms == ['climate', 'ชุมชน', 'gis']
+    assert all(is_content_term(term) for term in terms)
+    assert not is_content_term('และ') and not is_content_term('x')
+
+def test_document_offsets_mark_slide_starts():
+    tokenizer = ThaiEnglishTokenizer()
+    stream = tokenizer.tokenize_document(Document.from_sections(["climate system", "", "GIS data tools"]))
+    assert stream.tokens == ['climate', 'system', 'gis', 'data', 'tool']
+    assert list(stream.slide_offsets) == [0, 2, 2, 5]
+    assert stream.token_bounds(1, 3) == (2, 5)
+    assert stream.token_bounds(2, 1) == (0, 0)
+    assert stream.token_bounds(0, 99) == (0, 5)
@@ -0,0 +1,25 @@
+import io
+
+import pytest
+
+from utils.upload_ingest import BufferStream
+
+DATA = b"0123456789" * 10
+
+@pytest.mark.parametrize('offset, whence', [(5, io.SEEK_END), (150, io.SEEK_SET), (0, io.SEEK_END)])
+def test_buffer_stream_reads_nothing_past_the_end(offset, whence):
+    stream, reference = BufferStream(DATA), io.BytesIO(DATA)
+    assert stream.seek(offset, whence) == reference.seek(offset, whence)
+    assert stream.read() == reference.read() == b""
+    assert stream.read(10) == reference.read(10) == b""
+    assert stream.tell() == reference.tell()
+
+def test_buffer_stream_matches_bytes_io():
+    stream, reference = BufferStream(DATA), io.BytesIO(DATA)
+    for offset, whence, size in [(3, io.SEEK_SET, 7), (4, io.SEEK_CUR, 20), (-12, io.SEEK_END, 50), (-500, io.SEEK_CUR, 5)]:
+        stream.seek(offset, whence)
+        reference.seek(offset, whence)
+        assert stream.read(size) == reference.read(size)
+        assert stream.tell() == reference.tell()
+    stream.seek(0)
+    assert stream.read() == DATA
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from utils import usage_ledger
+from utils.usage_ledger import UsageLedger, UsageRecord, estimate_cost
+
+PRICING = {'gpt-4o-mini': (0.15, 0.60)}
+
+def _record(content_hash='deck', course_code='282711', prompt_tokens=1000, completion_tokens=500,
+            cache_hit=False, succeeded=True, model='gpt-4o-mini'):
+    return UsageRecord(course_code, 'assessor', model, content_hash, prompt_tokens, completion_tokens,
+                       120.0, cache_hit, succeeded)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(usage_ledger.time, 'time', lambda: now[0])
+    return now
+
+def test_estimate_cost_uses_per_million_prices():
+    assert estimate_cost(PRICING, 'gpt-4o-mini', 1_000_000, 2_000_000) == pytest.approx(1.35)
+    assert estimate_cost(PRICING, 'unknown', 1_000_000, 1_000_000) == 0.0
+
+def test_summary_rolls_up_requests_hits_failures_and_cost(tmp_path, clock):
+    ledger = UsageLedger(tmp_path / "usage.sqlite3", PRICING)
+    ledger.record([_record(), _record(prompt_tokens=0, completion_tokens=0, cache_hit=True),
+                   _record(course_code='282712', succeeded=False)])
+    (row,) = ledger.summary('model')
+    assert (row['requests'], row['cache_hits'], row['api_calls'], row['failures']) == (3, 1, 2, 1)
+    assert (row['prompt_tokens'], row['completion_tokens'], row['total_tokens']) == (2000, 1000, 3000)
+    assert row['cost_usd'] == pytest.approx(2 * estimate_cost(PRICING, 'gpt-4o-mini', 1000, 500))
+    assert row['avg_latency_ms'] == 120.0
+    assert [row['course'] for row in ledger.summary('course')] == ['282711', '282712']
+    assert ledger.summary('day', since=clock[0] + 1) == []
+
+def test_failed_batch_is_rolled_back(tmp_path, clock):
+    ledger = UsageLedger(tmp_path / "usage.sqlite3", PRICING)
+    with pytest.raises(sqlite3.IntegrityError):
+        ledger.record([_record(), _record(model=None)])
+    assert ledger.summary('model') == []
+    ledger.record([_record()])
+    assert ledger.summary('model')[0]['requests'] == 1
+
+def test_document_averages_count_each_deck_once(tmp_path, clock):
+    ledger = UsageLedger(tmp_path / "usage.sqlite3", PRICING)
+    assert ledger.document_averages('gpt-4o-mini') is None
+    # 'a' is analysed twice in two chunks each; 'b' once in four chunks
+    for _ in range(2):
+        ledger.record([_record('a', prompt_tokens=100, completion_tokens=10)] * 2)
+        clock[0] += 1
+    ledger.record([_record('b', prompt_tokens=300, completion_tokens=30)] * 4
+                  + [_record('b', cache_hit=True), _record('b', succeeded=False)])
+    assert ledger.document_averages('gpt-4o-mini') == pytest.approx((3, 700, 70))
+    assert ledger.document_averages('gpt-4o-mini', course_code='282712') is None
@@ -0,0 +1,152 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Row i of every array belongs to document i; columns follow the *_codes order
+BatchScores = namedtuple('BatchScores', [
+    'clo_codes', 'plo_codes', 'ylo_codes',
+    'clo_scores', 'clo_coverage', 'clo_confidence',
+    'plo_scores', 'plo_confidence',
+    'ylo_scores', 'ylo_confidence',
+    'clo_average', 'plo_average', 'ylo_average', 'overall_confidence'
+])
+
+def round_like_python(values, digits):
+    """np.round, falling back to Python's correctly rounded round() for values near a .5 tie"""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(float(value), digits) for value in values[near_tie]]
+    return rounded
+
+def incidence_matrices(course, pattern_count):
+    """Pattern x CLO incidence of keyword slots and of description terms"""
+    keyword_incidence = np.zeros((pattern_count, len(course.clos)), dtype=np.int64)
+    term_incidence = np.zeros((pattern_count, len(course.clos)), dtype=np.int64)
+    for column, clo in enumerate(course.clos):
+        for pattern_id in clo.keyword_ids:
+            if pattern_id is not None:
+                keyword_incidence[pattern_id, column] += 1
+        for pattern_id in clo.term_ids:
+            if pattern_id is not None:
+                term_incidence[pattern_id, column] += 1
+    return keyword_incidence, term_incidence
+
+def keyword_totals(course):
+    return np.array([len(clo.keywords) for clo in course.clos], dtype=np.int64)
+
+def rule_based_clo_scores(found, desc_matches, totals):
+    """Keyword coverage and the unrounded rule-based CLO score: 50 + coverage x 40 + term bonus"""
+    has_keywords = totals > 0
+    safe_totals = np.where(has_keywords, totals, 1)
+    coverage = np.where(has_keywords, found / safe_totals, 0)
+    desc_bonus = np.minimum(desc_matches * 2, 10)
+    return coverage, np.where(has_keywords, np.minimum(100, 50 + coverage * 40 + desc_bonus), 50)
+
+def _ai_matrices(course, ai_analyses, document_count):
+    """AI CLO scores/confidences per document plus a mask of where they apply"""
+    mask = np.zeros((document_count, len(course.clos)), dtype=bool)
+    scores = np.zeros(mask.shape)
+    confidences = np.full(mask.shape, 0.8)
+    for row, ai_analysis in enumerate(ai_analyses or ()):
+        if not ai_analysis:
+            continue
+        content_analysis = ai_analysis.get('content_analysis', {})
+        for column, clo in enumerate(course.clos):
+            if clo.code in content_analysis:
+                mask[row, column] = True
+                scores[row, column] = content_analysis[clo.code]['score']
+                confidences[row, column] = content_analysis[clo.code]['confidence']
+    return mask, scores, confidences
+
+def propagate(values, matrix, counts):
+    """Documents x inputs values pushed through an inputs x outputs weight matrix, averaged per output"""
+    # A broadcast sum rather than matmul: every row accumulates left to right whatever the batch
+    # size, so one document and a batch of thousands produce bit-identical scores
+    totals = (values[:, :, None] * matrix).sum(axis=1)
+    return np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+
+def propagate_plos(course, clo_scores, clo_confidence):
+    """Raw PLO scores (weighted) and confidences (plain mean) from documents x CLOs arrays"""
+    propagation = course.propagation
+    return (propagate(clo_scores, propagation.clo_plo, propagation.plo_clo_counts),
+            propagate(clo_confidence, propagation.clo_plo > 0, propagation.plo_clo_counts))
+
+def propagate_ylos(course, plo_scores, plo_confidence):
+    """Raw YLO scores and confidences: means over the mapped PLOs the course assesses"""
+    propagation = course.propagation
+    return (propagate(plo_scores, propagation.plo_ylo, propagation.ylo_plo_counts),
+            propagate(plo_confidence, propagation.plo_ylo, propagation.ylo_plo_counts))
+
+def _weighted_mean(columns, weights, count):
+    """Left-to-right sum of column * weight divided by count, matching the scalar engine"""
+    total = np.zeros_like(columns[0]) if columns else 0.0
+    for column, weight in zip(columns, weights):
+        total = total + column * weight
+    return total / count
+
+def score_batch(course, hits, ai_analyses=None):
+    """Score many documents (one AutomatonHits each from the program automaton) against one course"""
+    # The arithmetic mirrors MultiLevelAssessmentEngine.calculate_multi_level_alignment
+    # operation for operation, so every score equals the per-document result
+    document_count = len(hits)
+    pattern_count = len(hits[0].lengths) if hits else 0
+    counts = np.zeros((document_count, pattern_count), dtype=np.int64)
+    for row, document_hits in enumerate(hits):
+        counts[row] = document_hits.counts()
+
+    # Document x term counts times term x CLO incidence gives the matches per CLO
+    presence = (counts > 0).astype(np.int64)
+    keyword_incidence, term_incidence = incidence_matrices(course, pattern_count)
+    found = presence @ keyword_incidence
+    desc_matches = presence @ term_incidence
+
+    totals = keyword_totals(course)
+    coverage, clo_raw = rule_based_clo_scores(found, desc_matches, totals)
+
+    ai_mask, ai_scores, ai_confidences = _ai_matrices(course, ai_analyses, document_count)
+    clo_raw = np.where(ai_mask, clo_raw * 0.4 + ai_scores * 0.6, clo_raw)
+    clo_scores = round_like_python(clo_raw, 1)
+    clo_confidence = round_like_python(ai_confidences, 2)
+
+    # PLOs: weighted mean of the related (rounded) CLO scores; YLOs: mean of the mapped PLOs
+    plo_raw, plo_confidence = propagate_plos(course, clo_scores, clo_confidence)
+    plo_scores = round_like_python(plo_raw, 1)
+    ylo_raw, ylo_confidence_raw = propagate_ylos(course, plo_scores, plo_confidence)
+    ylo_scores = round_like_python(ylo_raw, 1)
+    ylo_confidence = round_like_python(ylo_confidence_raw, 3)
+
+    clo_count = len(course.clos)
+    clo_average = _weighted_mean(list(clo_scores.T), [1] * clo_count, clo_count) if clo_count else np.zeros(document_count)
+    overall_confidence = (_weighted_mean(list(clo_confidence.T), [1] * clo_count, clo_count)
+                          if clo_count else np.zeros(document_count))
+
+    plo_weight_list = course.propagation.plo_weights.tolist()
+    plo_average = _ratio(_weighted_mean(list(plo_scores.T), plo_weight_list, 1), plo_weight_list, document_count)
+
+    ylo_weight_list = course.propagation.ylo_multipliers.tolist()
+    ylo_average = _ratio(_weighted_mean(list(ylo_scores.T), ylo_weight_list, 1), ylo_weight_list, document_count)
+
+    return BatchScores(
+        [clo.code for clo in course.clos],
+        [plo.code for plo in course.plo_links],
+        [ylo.code for ylo in course.ylos],
+        clo_scores, coverage, clo_confidence,
+        plo_scores, plo_confidence,
+        ylo_scores, ylo_confidence,
+        round_like_python(clo_average, 1),
+        round_like_python(plo_average, 1),
+        round_like_python(ylo_average, 1),
+        round_like_python(overall_confidence, 3)
+    )
+
+def _ratio(weighted_sum, weights, document_count):
+    """weighted_sum / sum(weights) with the scalar engine's accumulation order; 0 without weights"""
+    total_weight = 0
+    for weight in weights:
+        total_weight += weight
+    if not weights or total_weight <= 0:
+        return np.zeros(document_count)
+    return weighted_sum / total_weight
@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.thai_tokenizer import is_content_term
+
+class SparseVector:
+    """Term-id indices (sorted) with matching values, like one row of a CSR matrix"""
+    __slots__ = ('indices', 'data')
+
+    def __init__(self, indices, data):
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def from_ids(cls, term_ids):
+        """Term-frequency vector from a sequence of term ids"""
+        indices, counts = np.unique(np.asarray(term_ids, dtype=np.int64), return_counts=True)
+        return cls(indices, counts.astype(np.float64))
+
+    def __len__(self):
+        return len(self.indices)
+
+class QueryMatrix:
+    """CSR-style rows of query term ids (one row per CLO)"""
+    __slots__ = ('row_codes', 'indptr', 'indices')
+
+    def __init__(self, row_codes, rows):
+        self.row_codes = row_codes
+        self.indptr = np.cumsum([0] + [len(row) for row in rows]).astype(np.int64)
+        self.indices = np.concatenate([np.asarray(row, dtype=np.int64) for row in rows]) if rows else \
+            np.zeros(0, dtype=np.int64)
+
+    def row_ids(self):
+        """Row number of every stored entry"""
+        return np.repeat(np.arange(len(self.row_codes)), np.diff(self.indptr))
+
+class BM25Index:
+    """Inverted index over the program corpus, scoring CLO queries against decks with Okapi BM25"""
+
+    def __init__(self, k1=1.5, b=0.75, max_documents=None):
+        self.k1 = k1
+        self.b = b
+        self.max_documents = max_documents
+        self.vocabulary = {}
+        self.postings = []  # term id -> {document key: term frequency}
+        self._documents = OrderedDict()  # key -> (SparseVector, length, pinned)
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, key):
+        return key in self._documents
+
+    @property
+    def average_length(self):
+        return self._total_length / len(self._documents) if self._documents else 0.0
+
+    def term_ids(self, terms, add=False):
+        """Ids for terms; unknown terms are added (add=True) or dropped"""
+        ids = []
+        with self._lock:
+            for term in terms:
+                term_id = self.vocabulary.get(term)
+                if term_id is None and add:
+                    term_id = len(self.postings)
+                    self.vocabulary[term] = term_id
+                    self.postings.append({})
+                if term_id is not None:
+                    ids.append(term_id)
+        return ids
+
+    def vectorize(self, tokens):
+        """Term-frequency vector and length of tokens scored against the corpus without joining it"""
+        # Terms the corpus has never seen are dropped from the vector but still count towards the length
+        terms = [token for token in tokens if is_content_term(token)]
+        return SparseVector.from_ids(self.term_ids(terms)), len(terms)
+
+    def add_document(self, key, tokens, pinned=False):
+        """Index a document's content terms once per key and return its term-frequency vector"""
+        with self._lock:
+            if key in self._documents:
+                self._documents.move_to_end(key)
+                return self._documents[key][0], self._documents[key][1]
+
+            vector = SparseVector.from_ids(self.term_ids((t for t in tokens if is_content_term(t)), add=True))
+            length = int(vector.data.sum())
+            for term_id, frequency in zip(vector.indices.tolist(), vector.data.tolist()):
+                self.postings[term_id][key] = frequency
+            self._documents[key] = (vector, length, pinned)
+            self._total_length += length
+            self._evict()
+            return vector, length
+
+    def _evict(self):
+        """Drop the least recently used decks beyond max_documents; pinned documents stay"""
+        if self.max_documents is None:
+            return
+        unpinned = sum(1 for _, _, pinned in self._documents.values() if not pinned)
+        for key in list(self._documents):
+            if unpinned <= self.max_documents:
+                break
+            vector, length, pinned = self._documents[key]
+            if pinned:
+                continue
+            for term_id in vector.indices.tolist():
+                self.postings[term_id].pop(key, None)
+            del self._documents[key]
+            self._total_length -= length
+            unpinned -= 1
+
+    def idf(self, term_ids):
+        """BM25 idf, ln(1 + (N - df + 0.5) / (df + 0.5)), for an array of term ids"""
+        with self._lock:
+            total = len(self._documents)
+            document_frequency = np.array([len(self.postings[t]) for t in term_ids.tolist()], dtype=np.float64)
+        return np.log1p((total - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def score(self, vector, length, queries):
+        """Normalised BM25 (0-1) of each query row against one document vector"""
+        row_count = len(queries.row_codes)
+        if not len(queries.indices) or not len(vector):
+            return np.zeros(row_count)
+
+        # Look every query entry up in the sorted document indices at once
+        k1, b = self.k1, self.b
+        positions = np.minimum(np.searchsorted(vector.indices, queries.indices), len(vector) - 1)
+        frequencies = np.where(vector.indices[positions] == queries.indices, vector.data[positions], 0.0)
+
+        idf = self.idf(queries.indices)
+        norm = k1 * (1 - b + b * length / (self.average_length or 1.0))
+        contributions = idf * frequencies * (k1 + 1) / (frequencies + norm)
+
+        # 1.0 means as relevant as an average-length deck containing every query term once
+        rows = queries.row_ids()
+        scores = np.bincount(rows, weights=contributions, minlength=row_count)
+        references = np.bincount(rows, weights=idf, minlength=row_count)
+        return np.minimum(1.0, np.divide(scores, references, out=np.zeros(row_count), where=references > 0))
+
+def compile_course_queries(index, course_data, tokenizer):
+    """One query row per CLO: its keywords' content terms plus its description terms"""
+    rows = []
+    for clo_code, clo_description in course_data['clo'].items():
+        terms = [token for keyword in course_data['keywords'].get(clo_code, [])
+                 for token in tokenizer.tokenize(keyword) if is_content_term(token)]
+        terms.extend(tokenizer.content_terms(clo_description))
+        rows.append(sorted(set(index.term_ids(dict.fromkeys(terms), add=True))))
+    return QueryMatrix(list(course_data['clo']), rows)
+
+def build_program_index(course_descriptions, tokenizer, **options):
+    """Seed an index with every course description and CLO text (kept pinned) and compile queries"""
+    index = BM25Index(**options)
+    queries = {}
+    for course_code, course_data in course_descriptions.items():
+        index.add_document(f"course:{course_code}", tokenizer.tokenize(course_data.get('description', '')),
+                           pinned=True)
+        for clo_code, clo_description in course_data['clo'].items():
+            keywords = " ".join(course_data['keywords'].get(clo_code, []))
+            index.add_document(f"clo:{course_code}:{clo_code}",
+                               tokenizer.tokenize(f"{clo_description} {keywords}"), pinned=True)
+        queries[course_code] = compile_course_queries(index, course_data, tokenizer)
+    return index, queries
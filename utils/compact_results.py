@@ -0,0 +1,114 @@
+from array import array
+from collections import namedtuple
+
+# One file's assessment as numbers only: every array follows the course model's CLO/PLO/YLO order,
+# and description text is looked up again from the model when the record is displayed
+CompactAssessment = namedtuple('CompactAssessment', [
+    'assessment_id', 'course_code', 'file_name', 'content_hash', 'content_length', 'scoring_mode',
+    'ai_enhanced', 'ai_recommendations',
+    'clo_scores', 'clo_confidence', 'keyword_masks', 'clo_relevance', 'clo_insights',
+    'plo_scores', 'plo_confidence',
+    'ylo_scores', 'ylo_confidence', 'ylo_similarity',
+    'overall'  # clo_average, plo_average, ylo_average, overall_confidence
+])
+
+OVERALL_FIELDS = ('clo_average', 'plo_average', 'ylo_average', 'overall_confidence')
+
+def _optional_array(values):
+    """array('d') of the values, or None when the field is absent from every entry"""
+    return None if any(value is None for value in values) else array('d', values)
+
+def keyword_mask(keywords, found_keywords):
+    """Bit i set when keywords[i] was found"""
+    found = set(found_keywords)
+    return sum(1 << index for index, keyword in enumerate(keywords) if keyword in found)
+
+def compact_assessment(results, course):
+    """Drop the descriptions, preview and prose from a result dict, keeping scores and keyword hits"""
+    clo_results = [results['clo_results'][clo.code] for clo in course.clos]
+    plo_results = [results['plo_results'][plo.code] for plo in course.plo_links]
+    ylo_results = [results['ylo_results'][ylo.code] for ylo in course.ylos]
+    relevance_key = f"{results.get('scoring_mode', 'rule')}_relevance"
+
+    insights = tuple(tuple(clo.get('ai_insights', ())) for clo in clo_results)
+    return CompactAssessment(
+        results['assessment_id'],
+        results['course_code'],
+        results.get('file_name'),
+        results['content_hash'],
+        results['content_length'],
+        results.get('scoring_mode', 'rule'),
+        results['ai_enhanced'],
+        tuple(results.get('ai_recommendations', ())),
+        array('d', [clo['score'] for clo in clo_results]),
+        array('d', [clo['confidence'] for clo in clo_results]),
+        tuple(keyword_mask(clo.keywords, data['found_keywords']) for clo, data in zip(course.clos, clo_results)),
+        _optional_array([clo.get(relevance_key) for clo in clo_results]),
+        insights if any(insights) else None,
+        array('d', [plo['score'] for plo in plo_results]),
+        array('d', [plo['confidence'] for plo in plo_results]),
+        array('d', [ylo['score'] for ylo in ylo_results]),
+        array('d', [ylo['confidence'] for ylo in ylo_results]),
+        _optional_array([ylo.get('semantic_similarity') for ylo in ylo_results]),
+        array('d', [results['overall_scores'][field] for field in OVERALL_FIELDS])
+    )
+
+def expand_assessment(record, course):
+    """Rebuild the CLO/PLO/YLO result dicts of a compact record, resolving text from the course model"""
+    clo_results = {}
+    for index, clo in enumerate(course.clos):
+        found_keywords = [keyword for bit, keyword in enumerate(clo.keywords) if record.keyword_masks[index] >> bit & 1]
+        clo_results[clo.code] = {
+            'score': record.clo_scores[index],
+            'description': clo.description,
+            'found_keywords': found_keywords,
+            'total_keywords': len(clo.keywords),
+            'coverage': len(found_keywords) / len(clo.keywords) if clo.keywords else 0,
+            'confidence': record.clo_confidence[index],
+            'ai_insights': list(record.clo_insights[index]) if record.clo_insights else [],
+            'ai_enhanced': record.ai_enhanced
+        }
+        if record.clo_relevance is not None:
+            clo_results[clo.code][f'{record.scoring_mode}_relevance'] = record.clo_relevance[index]
+
+    plo_results = {
+        plo.code: {
+            'score': record.plo_scores[index],
+            'related_clos': list(plo.related_clos),
+            'description': plo.description,
+            'confidence': record.plo_confidence[index]
+        }
+        for index, plo in enumerate(course.plo_links)
+    }
+
+    ylo_results = {}
+    for index, ylo in enumerate(course.ylos):
+        ylo_results[ylo.code] = {
+            'score': record.ylo_scores[index],
+            'related_plos': list(ylo.related_plos),
+            'description': ylo.description,
+            'level': ylo.level,
+            'cognitive_level': ylo.cognitive_level,
+            'confidence': record.ylo_confidence[index],
+            'cognitive_multiplier': ylo.cognitive_multiplier
+        }
+        if record.ylo_similarity is not None:
+            ylo_results[ylo.code]['semantic_similarity'] = record.ylo_similarity[index]
+
+    results = {
+        'assessment_id': record.assessment_id,
+        'course_code': record.course_code,
+        'course_name': course.name,
+        'content_hash': record.content_hash,
+        'content_length': record.content_length,
+        'scoring_mode': record.scoring_mode,
+        'clo_results': clo_results,
+        'plo_results': plo_results,
+        'ylo_results': ylo_results,
+        'overall_scores': dict(zip(OVERALL_FIELDS, record.overall)),
+        'ai_enhanced': record.ai_enhanced,
+        'ai_recommendations': list(record.ai_recommendations)
+    }
+    if record.file_name is not None:
+        results['file_name'] = record.file_name
+    return results
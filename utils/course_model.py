@@ -0,0 +1,125 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+from utils.keyword_automaton import KeywordAutomaton
+
+# CLO keywords that tie a CLO to a mapped PLO, and the subset that weights it by 1.2
+PLO_RELATED_TERMS = {
+    'PLO1': ['เทคโนโลยี', 'technology', 'GIS', 'ระบบ', 'ยั่งยืน', 'sustainable'],
+    'PLO2': ['วิจัย', 'research', 'วิธีการ', 'methodology', 'วิเคราะห์', 'analysis', 'บูรณาการ', 'integrate'],
+    'PLO3': ['สื่อสาร', 'communicate', 'นำเสนอ', 'present', 'เขียน', 'writing', 'รายงาน', 'report']
+}
+PLO_EMPHASIS_TERMS = {
+    'PLO1': ['เทคโนโลยี', 'technology', 'GIS'],
+    'PLO2': ['วิจัย', 'research', 'วิเคราะห์'],
+    'PLO3': ['สื่อสาร', 'communicate', 'นำเสนอ']
+}
+PLO_EMPHASIS_WEIGHT = 1.2
+
+COGNITIVE_WEIGHTS = {
+    'Understanding': 1.0,
+    'Applying': 1.1,
+    'Evaluating': 1.2,
+    'Creating': 1.3
+}
+
+# keyword_ids align with keywords; term_ids are the description's distinct content terms
+CLOModel = namedtuple('CLOModel', ['code', 'description', 'keywords', 'keyword_ids', 'term_ids'])
+# related_clos falls back to every CLO when no keyword ties one to the PLO
+PLOLink = namedtuple('PLOLink', ['code', 'description', 'related_clos', 'clo_weights'])
+YLOModel = namedtuple('YLOModel', ['code', 'description', 'level', 'cognitive_level',
+                                   'cognitive_multiplier', 'related_plos'])
+# clo_plo[i, j]: weight of CLO i in PLO j (0 if unrelated); plo_ylo[j, k]: 1 if PLO j feeds YLO k
+Propagation = namedtuple('Propagation', ['clo_plo', 'plo_clo_counts', 'plo_ylo', 'ylo_plo_counts',
+                                         'plo_weights', 'ylo_multipliers'])
+CourseModel = namedtuple('CourseModel', ['code', 'name', 'clos', 'plo_links', 'ylos', 'propagation'])
+# One automaton holds the patterns of every course, so a single scan serves them all
+ProgramModel = namedtuple('ProgramModel', ['courses', 'automaton', 'plo_weights', 'tokenizer'])
+
+def _compile_plo_link(plo_code, plo_data, course_data):
+    """Resolve which CLOs feed a PLO, and with what weight, from the course keywords"""
+    keywords = course_data.get('keywords', {})
+    related_terms = PLO_RELATED_TERMS.get(plo_code, [])
+    emphasis_terms = PLO_EMPHASIS_TERMS.get(plo_code, [])
+
+    related_clos = tuple(clo for clo in course_data['clo']
+                         if any(keyword in related_terms for keyword in keywords.get(clo, [])))
+    if not related_clos:
+        related_clos = tuple(course_data['clo'])
+
+    clo_weights = tuple(
+        PLO_EMPHASIS_WEIGHT if any(keyword in emphasis_terms for keyword in keywords.get(clo, [])) else 1.0
+        for clo in related_clos
+    )
+    return PLOLink(plo_code, plo_data['description'], related_clos, clo_weights)
+
+def _frozen(values, dtype=np.float64):
+    array = np.array(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+def _compile_propagation(clos, plo_links, ylos, plos):
+    """CLO x PLO and PLO x YLO weight matrices plus the PLO/YLO weights of the overall averages"""
+    clo_row = {clo.code: row for row, clo in enumerate(clos)}
+    clo_plo = np.zeros((len(clos), len(plo_links)))
+    for column, plo in enumerate(plo_links):
+        for clo_code, weight in zip(plo.related_clos, plo.clo_weights):
+            clo_plo[clo_row[clo_code], column] = weight
+
+    plo_row = {plo.code: row for row, plo in enumerate(plo_links)}
+    plo_ylo = np.zeros((len(plo_links), len(ylos)))
+    for column, ylo in enumerate(ylos):
+        for plo_code in ylo.related_plos:
+            if plo_code in plo_row:
+                plo_ylo[plo_row[plo_code], column] = 1.0
+
+    return Propagation(
+        _frozen(clo_plo),
+        _frozen([len(plo.related_clos) for plo in plo_links], np.int64),
+        _frozen(plo_ylo),
+        _frozen((plo_ylo > 0).sum(axis=0), np.int64),
+        _frozen([plos[plo.code]['weight'] / 100 for plo in plo_links]),
+        _frozen([ylo.cognitive_multiplier for ylo in ylos])
+    )
+
+def _compile_course(course_code, course_data, ylo_structure, plos, tokenizer, automaton):
+    clos = []
+    for clo_code, clo_description in course_data['clo'].items():
+        keywords = tuple(course_data['keywords'].get(clo_code, []))
+        clos.append(CLOModel(
+            clo_code,
+            clo_description,
+            keywords,
+            tuple(automaton.add(tokenizer.tokenize(keyword)) for keyword in keywords),
+            tuple(automaton.add((term,)) for term in tokenizer.content_terms(clo_description))
+        ))
+
+    plo_links = tuple(_compile_plo_link(plo_code, plos[plo_code], course_data)
+                      for plo_code in course_data.get('plo_mapping', []))
+
+    ylos = []
+    for ylo_code in course_data.get('ylo_mapping', []):
+        ylo_data = ylo_structure[ylo_code]
+        ylos.append(YLOModel(
+            ylo_code,
+            ylo_data['description'],
+            ylo_data['level'],
+            ylo_data['cognitive_level'],
+            COGNITIVE_WEIGHTS.get(ylo_data['cognitive_level'], 1.0),
+            tuple(ylo_data['plo_mapping'])
+        ))
+
+    return CourseModel(course_code, course_data['name'], tuple(clos), plo_links, tuple(ylos),
+                       _compile_propagation(clos, plo_links, ylos, plos))
+
+def compile_program_model(course_descriptions, ylo_structure, plos, tokenizer):
+    """Compile the course/YLO/PLO configuration into an immutable, pre-tokenised model"""
+    automaton = KeywordAutomaton()
+    courses = {
+        course_code: _compile_course(course_code, course_data, ylo_structure, plos, tokenizer, automaton)
+        for course_code, course_data in course_descriptions.items()
+    }
+    plo_weights = {plo_code: plo_data['weight'] / 100 for plo_code, plo_data in plos.items()}
+    return ProgramModel(MappingProxyType(courses), automaton.compile(), MappingProxyType(plo_weights), tokenizer)
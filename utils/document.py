@@ -0,0 +1,99 @@
+from array import array
+
+SLIDE_SEPARATOR = "\n\n"
+
+class Slide:
+    """Lightweight view of one slide inside a Document (no text is copied until asked)"""
+    __slots__ = ('document', 'index')
+
+    def __init__(self, document, index):
+        self.document = document
+        self.index = index
+
+    @property
+    def number(self):
+        return self.index + 1
+
+    @property
+    def start(self):
+        return self.document.offsets[self.index]
+
+    @property
+    def end(self):
+        return self.document.offsets[self.index + 1] - len(self.document.separator)
+
+    @property
+    def text(self):
+        return self.document.text[self.start:self.end]
+
+    def __repr__(self):
+        return f"Slide({self.number}, chars={self.end - self.start})"
+
+class Document:
+    """Extracted text kept in one contiguous buffer with per-slide start offsets"""
+    __slots__ = ('name', 'text', 'offsets', 'separator', '_derived')
+
+    def __init__(self, text, offsets, name=None, separator=SLIDE_SEPARATOR):
+        self.name = name
+        self.text = text
+        self.offsets = offsets  # array('Q'): slide i spans offsets[i] .. offsets[i + 1] - len(separator)
+        self.separator = separator
+        self._derived = {}
+
+    @classmethod
+    def from_sections(cls, sections, name=None, separator=SLIDE_SEPARATOR):
+        """Build a document from an iterable of per-slide/page texts"""
+        parts = []
+        offsets = array('Q', [0])
+        position = 0
+        for section in sections:
+            parts.append(section)
+            position += len(section) + len(separator)
+            offsets.append(position)
+        # The final offset is virtual: the text carries no trailing separator
+        return cls(separator.join(parts), offsets, name, separator)
+
+    @classmethod
+    def from_text(cls, text, name=None):
+        """Wrap plain text as a single-section document"""
+        return cls.from_sections([text], name=name)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Slide(self, index)
+
+    def __iter__(self):
+        return (Slide(self, i) for i in range(len(self)))
+
+    def __str__(self):
+        return self.text
+
+    def char_bounds(self, start_slide=0, stop_slide=None):
+        """Character span [start, end) covering slides start_slide .. stop_slide - 1"""
+        stop_slide = len(self) if stop_slide is None else min(stop_slide, len(self))
+        start_slide = max(0, start_slide)
+        if start_slide >= stop_slide:
+            return 0, 0
+        return self.offsets[start_slide], self.offsets[stop_slide] - len(self.separator)
+
+    def sections(self):
+        """Per-slide texts (copies), e.g. for serialisation"""
+        return [slide.text for slide in self]
+
+    def derived(self, key, factory):
+        """Memoise data computed from this document (normalised text, tokens, ...)"""
+        if key not in self._derived:
+            self._derived[key] = factory(self)
+        return self._derived[key]
+
+def as_document(content, name=None):
+    """Accept either a Document or plain text"""
+    if isinstance(content, Document):
+        return content
+    return Document.from_text(content or "", name=name)
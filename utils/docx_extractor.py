@@ -0,0 +1,57 @@
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+NS_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Paragraph styles that open a new section (style ids, including localised "1", "2", ...)
+HEADING_STYLE = re.compile(r'(?i)^(heading\s*[12]|title|[12])$')
+
+class DOCXExtractor:
+    """Extract Word text section by section, streaming word/document.xml"""
+
+    def iter_sections(self, file):
+        """Yield the text under each top-level heading (text before the first heading included)"""
+        if not zipfile.is_zipfile(file):
+            raise Exception("ไม่สามารถอ่านไฟล์ Word: รองรับเฉพาะไฟล์ .docx")
+        file.seek(0)
+
+        try:
+            with zipfile.ZipFile(file) as archive:
+                with archive.open('word/document.xml') as stream:
+                    paragraphs = []
+                    for paragraph, is_heading in self._iter_paragraphs(stream):
+                        if is_heading and paragraphs:
+                            yield "\n".join(paragraphs)
+                            paragraphs = []
+                        paragraphs.append(paragraph)
+                    if paragraphs:
+                        yield "\n".join(paragraphs)
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise Exception(f"ไม่สามารถอ่านไฟล์ Word: {str(e)}")
+
+    def _iter_paragraphs(self, stream):
+        """Stream (text, is_heading) per non-empty paragraph, clearing parsed elements"""
+        runs = []
+        is_heading = False
+
+        for _, elem in ET.iterparse(stream):
+            tag = elem.tag
+            if tag == f'{NS_W}t':
+                if elem.text:
+                    runs.append(elem.text)
+            elif tag == f'{NS_W}tab':
+                runs.append("\t")
+            elif tag in (f'{NS_W}br', f'{NS_W}cr'):
+                runs.append("\n")
+            elif tag == f'{NS_W}pStyle':
+                is_heading = bool(HEADING_STYLE.match(elem.get(f'{NS_W}val', '')))
+            elif tag == f'{NS_W}outlineLvl':
+                is_heading = elem.get(f'{NS_W}val') in ('0', '1')
+            elif tag == f'{NS_W}p':
+                paragraph = "".join(runs).strip()
+                if paragraph:
+                    yield paragraph, is_heading
+                runs = []
+                is_heading = False
+                elem.clear()
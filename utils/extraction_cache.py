@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from pathlib import Path
+
+class ExtractionCache:
+    """Content-addressed on-disk cache of extracted sections with LRU eviction"""
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(data_digest: str, extractor_version: str, kind: str) -> str:
+        """Combine the SHA-256 of the upload bytes with the extractor version and kind"""
+        # The same bytes parse differently as e.g. markdown and html, so each kind has its own entry
+        return hashlib.sha256(f"{extractor_version}:{kind}:{data_digest}".encode()).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.z"
+
+    def get(self, key):
+        """Return cached sections or None; a hit refreshes the entry's LRU position"""
+        path = self._path(key)
+        try:
+            compressed = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        try:
+            return json.loads(zlib.decompress(compressed).decode('utf-8'))
+        except (zlib.error, ValueError):
+            # Corrupt entry (e.g. a crashed writer on another host); drop it
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key, sections):
+        """Store sections compressed, then evict least recently used entries over the size bound"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename so concurrent readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(zlib.compress(json.dumps(sections, ensure_ascii=False).encode('utf-8'), 6))
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self._evict()
+
+    def _evict(self):
+        """Delete oldest-accessed entries until the cache fits in max_bytes"""
+        entries = []
+        total_bytes = 0
+        for path in self.cache_dir.glob('*/*.z'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            if total_bytes <= self.max_bytes:
+                break
+
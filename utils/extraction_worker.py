@@ -0,0 +1,157 @@
+import mmap
+import multiprocessing
+import os
+import signal
+import time
+import warnings
+from pathlib import Path
+
+from utils.extractors import get_extractor
+from utils.upload_ingest import BufferStream
+
+# Memory is measured from /proc, so the RSS cap is only enforced on Linux
+RSS_MONITORING = Path("/proc/self/status").exists()
+
+class ExtractionError(Exception):
+    """Structured failure for a single file's extraction"""
+
+    def __init__(self, kind, message, file_name=None):
+        super().__init__(message)
+        self.kind = kind  # 'timeout', 'memory', 'crash' or 'invalid'
+        self.message = message
+        self.file_name = file_name
+
+    def to_dict(self):
+        return {'file_name': self.file_name, 'kind': self.kind, 'message': self.message}
+
+# Stats of a 0-byte file, shaped like each extractor's own
+EMPTY_PDF_STATS = {'pages': 0, 'seconds': 0.0, 'pages_per_second': 0.0, 'mode': 'sequential', 'workers': 1}
+
+def extract_document(kind, source, pdf_options=None):
+    """Extract per-section texts and stats from a spooled file path or in-memory bytes"""
+    size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+    if size == 0:
+        # An empty upload is an empty document, not a corrupt one (and mmap rejects empty files)
+        return [], dict(EMPTY_PDF_STATS) if kind == 'pdf' else {'sections': 0}
+
+    if isinstance(source, (bytes, bytearray)):
+        with BufferStream(source) as stream:
+            return _extract_from_buffer(kind, stream, None, pdf_options)
+
+    path = source
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        with BufferStream(buffer) as source:
+            return _extract_from_buffer(kind, source, path, pdf_options)
+
+def _extract_from_buffer(kind, source, path, pdf_options):
+    if kind == 'pdf':
+        extractor = get_extractor(kind, **(pdf_options or {}))
+        # Parallel page workers reopen the spool file rather than receive its bytes
+        pages = list(extractor.iter_sections(source, source_path=path))
+        return pages, extractor.last_stats
+
+    sections = list(get_extractor(kind).iter_sections(source))
+    return sections, {'sections': len(sections)}
+
+def _worker_entry(conn, kind, source, pdf_options):
+    """Child process entry point: extract and send back a tagged result"""
+    try:
+        sections, stats = extract_document(kind, source, pdf_options)
+        conn.send(('ok', sections, stats))
+    except MemoryError:
+        conn.send(('error', 'memory', "หน่วยความจำไม่พอสำหรับการสกัดข้อความ"))
+    except Exception as e:
+        conn.send(('error', 'invalid', str(e)))
+    finally:
+        conn.close()
+
+def _child_pids(pid):
+    """Direct children of a process (Linux /proc; empty elsewhere)"""
+    children = []
+    for task_dir in Path(f"/proc/{pid}/task").glob('*'):
+        try:
+            children.extend(int(child) for child in (task_dir / 'children').read_text().split())
+        except (OSError, ValueError):
+            continue
+    return children
+
+def _process_tree(pid):
+    """The process and all its descendants"""
+    pids = [pid]
+    for child in _child_pids(pid):
+        pids.extend(_process_tree(child))
+    return pids
+
+def _rss_bytes(pid):
+    """Resident set size of one process in bytes, or 0 if unavailable"""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+def _kill_tree(process):
+    """Stop the worker and any pool processes it started"""
+    pids = _process_tree(process.pid) if process.pid else []
+    for pid in reversed(pids):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    process.join(timeout=5)
+
+def run_isolated_extraction(kind, source, file_name=None, timeout=120, memory_limit_mb=1024,
+                            pdf_options=None, poll_interval=0.1):
+    """Extract a spooled file (path) or in-memory bytes in a separate process with a timeout and an RSS cap"""
+    # The RSS cap covers the worker and its PDF page pool and needs Linux /proc; elsewhere only the
+    # timeout applies and a warning is issued (once per process under the default warning filters)
+    if not RSS_MONITORING:
+        warnings.warn(f"memory_limit_mb={memory_limit_mb} is not enforced: /proc is unavailable on this platform",
+                      RuntimeWarning, stacklevel=2)
+    ctx = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    if not isinstance(source, (bytes, bytearray)):
+        source = str(source)
+    process = ctx.Process(target=_worker_entry, args=(child_conn, kind, source, pdf_options))
+    memory_limit = memory_limit_mb * 1024 * 1024
+    deadline = time.monotonic() + timeout
+    message = None
+
+    process.start()
+    child_conn.close()
+    try:
+        while True:
+            if parent_conn.poll(poll_interval):
+                try:
+                    message = parent_conn.recv()
+                except EOFError:
+                    raise ExtractionError('crash', "กระบวนการสกัดข้อความหยุดทำงานโดยไม่คาดคิด", file_name)
+                break
+
+            if not process.is_alive():
+                raise ExtractionError(
+                    'crash', f"กระบวนการสกัดข้อความหยุดทำงาน (exit code {process.exitcode})", file_name
+                )
+
+            if time.monotonic() > deadline:
+                raise ExtractionError('timeout', f"ใช้เวลาสกัดข้อความเกิน {timeout} วินาที", file_name)
+
+            rss = sum(_rss_bytes(pid) for pid in _process_tree(process.pid))
+            if rss > memory_limit:
+                raise ExtractionError(
+                    'memory', f"ใช้หน่วยความจำเกิน {memory_limit_mb} MB ({rss / 1024 / 1024:.0f} MB)", file_name
+                )
+    finally:
+        parent_conn.close()
+        # Give a finished worker a moment to exit; cancel a failed one immediately
+        process.join(timeout=1 if message is not None else 0)
+        if process.is_alive():
+            _kill_tree(process)
+
+    if message[0] == 'ok':
+        return message[1], message[2]
+
+    _, error_kind, error_message = message
+    raise ExtractionError(error_kind, error_message, file_name)
@@ -0,0 +1,54 @@
+from collections import namedtuple
+from pathlib import Path
+
+from utils.docx_extractor import DOCXExtractor
+from utils.markup_extractor import HTMLExtractor, MarkdownExtractor
+from utils.odp_extractor import ODPExtractor
+from utils.pdf_extractor import PDFExtractor
+from utils.pptx_extractor import PPTXExtractor
+
+# factory(**options) returns an object with iter_sections(file) yielding one string per
+# page/slide/section; isolated formats are parsed in the sandboxed worker process
+ExtractorSpec = namedtuple('ExtractorSpec', ['kind', 'factory', 'suffixes', 'mime_types', 'isolated'])
+
+_REGISTRY = {}
+
+def register_extractor(kind, factory, suffixes=(), mime_types=(), isolated=True):
+    """Register (or replace) the extractor used for a file kind"""
+    _REGISTRY[kind] = ExtractorSpec(kind, factory, tuple(suffixes), tuple(mime_types), isolated)
+
+def extractor_kind(file_name, mime_type=None):
+    """Resolve a file to a registered kind by suffix, then by MIME type; None if unsupported"""
+    suffix = Path(file_name or "").suffix.lower()
+    for spec in _REGISTRY.values():
+        if suffix in spec.suffixes:
+            return spec.kind
+    for spec in _REGISTRY.values():
+        if mime_type in spec.mime_types:
+            return spec.kind
+    return None
+
+def get_extractor(kind, **options):
+    """Instantiate the extractor registered for a kind"""
+    return _REGISTRY[kind].factory(**options)
+
+def is_isolated(kind):
+    return _REGISTRY[kind].isolated
+
+def supported_suffixes():
+    """All registered suffixes without the dot, e.g. for st.file_uploader"""
+    return [suffix.lstrip('.') for spec in _REGISTRY.values() for suffix in spec.suffixes]
+
+register_extractor('pdf', PDFExtractor, ['.pdf'], ['application/pdf'])
+# Legacy binary .ppt is not a zip package, so python-pptx cannot open it; it stays unregistered
+register_extractor('pptx', PPTXExtractor, ['.pptx'], [
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+])
+register_extractor('docx', DOCXExtractor, ['.docx'], [
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+])
+register_extractor('odp', ODPExtractor, ['.odp'], ['application/vnd.oasis.opendocument.presentation'])
+# Plain-text formats are parsed in-process: no native code and no zip to inflate
+register_extractor('markdown', MarkdownExtractor, ['.md', '.markdown'], ['text/markdown', 'text/x-markdown'],
+                   isolated=False)
+register_extractor('html', HTMLExtractor, ['.html', '.htm'], ['text/html'], isolated=False)
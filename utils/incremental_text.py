@@ -0,0 +1,67 @@
+import difflib
+import re
+from array import array
+
+from utils.document import Document
+from utils.keyword_automaton import AutomatonHits
+from utils.thai_tokenizer import TokenStream
+
+PARAGRAPH_BREAK = re.compile(r'\n[ \t\r\f\v]*\n')
+
+def split_paragraphs(text):
+    """Non-empty paragraphs of pasted text, split at blank lines"""
+    return [paragraph.strip() for paragraph in PARAGRAPH_BREAK.split(text or "") if paragraph.strip()]
+
+def paragraph_document(text, name=None):
+    """Pasted text as a Document with one section per paragraph, the from-scratch form of update()"""
+    return Document.from_sections(split_paragraphs(text), name=name)
+
+class IncrementalTextAnalyzer:
+    """Per-paragraph tokens and keyword hits carried over between edits of the same text"""
+
+    def __init__(self, tokenizer, automaton):
+        self.tokenizer = tokenizer
+        self.automaton = automaton
+        self.paragraphs = []
+        self._entries = []  # (tokens, AutomatonHits) per paragraph, aligned with self.paragraphs
+        self.last_stats = {'paragraphs': 0, 'rescanned': 0}
+
+    def _scan(self, paragraph):
+        tokens = self.tokenizer.tokenize(paragraph)
+        return tokens, self.automaton.scan(tokens)
+
+    def update(self, text, name=None):
+        """Diff text against the previous version by paragraph and rescan only what changed"""
+        # Returns (Document with one section per paragraph, TokenStream, AutomatonHits); a full scan
+        # restarts at every section too, so cached paragraph hits equal a rescan of paragraph_document
+        paragraphs = split_paragraphs(text)
+        matcher = difflib.SequenceMatcher(None, self.paragraphs, paragraphs, autojunk=False)
+
+        entries = []
+        rescanned = 0
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag == 'equal':
+                entries.extend(self._entries[old_start:old_end])
+            else:
+                # 'delete' spans are empty on the new side and simply drop out
+                for paragraph in paragraphs[new_start:new_end]:
+                    entries.append(self._scan(paragraph))
+                    rescanned += 1
+
+        self.paragraphs, self._entries = paragraphs, entries
+        self.last_stats = {'paragraphs': len(paragraphs), 'rescanned': rescanned}
+        return (paragraph_document(text, name=name),) + self._merge()
+
+    def _merge(self):
+        """Concatenate cached paragraph results, shifting hit positions by each paragraph's token offset"""
+        tokens = []
+        slide_offsets = array('I', [0])
+        positions = [[] for _ in self.automaton.lengths]
+        for paragraph_tokens, hits in self._entries:
+            base = len(tokens)
+            for pattern_id, found in enumerate(hits.positions):
+                if found:
+                    positions[pattern_id].extend(position + base for position in found)
+            tokens.extend(paragraph_tokens)
+            slide_offsets.append(len(tokens))
+        return TokenStream(tokens, slide_offsets), AutomatonHits(self.automaton.lengths, positions)
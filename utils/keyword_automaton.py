@@ -0,0 +1,116 @@
+from bisect import bisect_left
+from collections import deque
+
+class AutomatonHits:
+    """Start positions of every pattern found by one scan, queryable per token span"""
+    __slots__ = ('lengths', 'positions')
+
+    def __init__(self, lengths, positions):
+        self.lengths = lengths
+        self.positions = positions  # pattern id -> sorted token start positions
+
+    def count(self, pattern_id, start=0, end=None):
+        """Occurrences of a pattern lying entirely inside [start, end)"""
+        if pattern_id is None:
+            return 0
+        found = self.positions[pattern_id]
+        if end is None:
+            return len(found) - bisect_left(found, start)
+        last_start = end - self.lengths[pattern_id]
+        return max(0, bisect_left(found, last_start + 1) - bisect_left(found, start))
+
+    def found(self, pattern_id, start=0, end=None):
+        return self.count(pattern_id, start, end) > 0
+
+    def counts(self):
+        """Whole-scan hit count per pattern id"""
+        return [len(found) for found in self.positions]
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over token sequences: all patterns found in one pass"""
+
+    def __init__(self, patterns=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [()]  # ids of patterns ending exactly at each node
+        self._output = [()]    # terminal ids plus those reachable by failure links
+        self._ids = {}
+        self.lengths = []
+        self._compiled = False
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern):
+        """Add a token tuple and return its id (shared by duplicates; None if empty)"""
+        pattern = tuple(pattern)
+        if not pattern:
+            return None
+        if pattern in self._ids:
+            return self._ids[pattern]
+
+        node = 0
+        for token in pattern:
+            child = self._goto[node].get(token)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][token] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(())
+                self._output.append(())
+            node = child
+
+        pattern_id = len(self.lengths)
+        self._ids[pattern] = pattern_id
+        self.lengths.append(len(pattern))
+        self._terminal[node] = self._terminal[node] + (pattern_id,)
+        self._compiled = False
+        return pattern_id
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def compile(self):
+        """Build failure links breadth-first and fold suffix outputs into each node"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._output[child] = self._terminal[child]
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._terminal[child] + self._output[self._fail[child]]
+                queue.append(child)
+
+        self._compiled = True
+        return self
+
+    def scan(self, tokens, start=0, end=None, boundaries=()):
+        """Single linear pass over tokens[start:end] returning counts and positions per pattern"""
+        # The state resets at every boundary offset (e.g. TokenStream.slide_offsets), so no match
+        # spans two slides or paragraphs
+        if not self._compiled:
+            self.compile()
+        end = len(tokens) if end is None else end
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self.lengths
+        positions = [[] for _ in lengths]
+
+        cuts = sorted({start, end} | {offset for offset in boundaries if start < offset < end})
+        for segment_start, segment_end in zip(cuts, cuts[1:]):
+            node = 0
+            for index in range(segment_start, segment_end):
+                token = tokens[index]
+                while node and token not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(token, 0)
+                for pattern_id in output[node]:
+                    positions[pattern_id].append(index - lengths[pattern_id] + 1)
+
+        return AutomatonHits(lengths, positions)
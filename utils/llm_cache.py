@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.sqlite_store import connect_shared
+from utils.stable_hash import stable_digest
+
+class LLMResponseCache:
+    """Two-tier cache of LLM analyses: an in-memory LRU in front of a SQLite table, with TTL"""
+
+    def __init__(self, db_path, max_memory_entries=256, ttl_seconds=30 * 24 * 3600):
+        self.db_path = Path(db_path)
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (created_at, payload JSON)
+        # Guards the memory tier and the connection together, so both tiers agree for concurrent sessions
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+        self._db = connect_shared(self.db_path, [
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                course_code TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS responses_version ON responses (prompt_version)"
+        ])
+        self.purge_expired()
+
+    @staticmethod
+    def make_key(content_hash, course_code, model, prompt_version):
+        return stable_digest(content_hash, course_code, model, prompt_version, purpose="llm-cache")
+
+    def _fresh(self, created_at, now):
+        return self.ttl_seconds is None or now - created_at < self.ttl_seconds
+
+    def _remember(self, key, created_at, payload):
+        self._memory[key] = (created_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, content_hash, course_code, model, prompt_version):
+        """Cached analysis (a fresh copy) or None; expired entries count as misses"""
+        key = self.make_key(content_hash, course_code, model, prompt_version)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._fresh(entry[0], now):
+                self._memory.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return json.loads(entry[1])
+            self._memory.pop(key, None)
+
+            row = self._db.execute("SELECT created_at, payload FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._fresh(row[0], now):
+                self._remember(key, *row)
+                self._counters['disk_hits'] += 1
+                return json.loads(row[1])
+
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, content_hash, course_code, model, prompt_version, analysis):
+        key = self.make_key(content_hash, course_code, model, prompt_version)
+        payload = json.dumps(analysis, ensure_ascii=False)
+        created_at = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, content_hash, course_code, model, prompt_version, created_at, payload)
+            )
+            self._remember(key, created_at, payload)
+            self._counters['writes'] += 1
+
+    def invalidate(self, keep_prompt_version=None):
+        """Drop every entry, or only those written by prompt versions other than keep_prompt_version"""
+        with self._lock:
+            if keep_prompt_version is None:
+                deleted = self._db.execute("DELETE FROM responses").rowcount
+            else:
+                deleted = self._db.execute("DELETE FROM responses WHERE prompt_version != ?",
+                                           (keep_prompt_version,)).rowcount
+            # The memory tier refills from SQLite on demand
+            self._memory.clear()
+            return deleted
+
+    def purge_expired(self):
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            return self._db.execute("DELETE FROM responses WHERE created_at < ?",
+                                    (time.time() - self.ttl_seconds,)).rowcount
+
+    def stats(self):
+        """Hit/miss counters since start-up plus the number of stored responses"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
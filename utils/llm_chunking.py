@@ -0,0 +1,70 @@
+def estimate_tokens(text):
+    """Tokenizer-free upper estimate: ~4 ASCII characters per token, one per non-ASCII (e.g. Thai) character"""
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+def _pieces(sections, budget):
+    """Non-empty sections, with any section over the budget cut into budget-sized windows"""
+    for section in sections:
+        section = section.strip()
+        if not section:
+            continue
+        tokens = estimate_tokens(section)
+        if tokens <= budget:
+            yield section, tokens
+            continue
+        step = max(1, len(section) * budget // tokens)
+        for start in range(0, len(section), step):
+            piece = section[start:start + step]
+            yield piece, estimate_tokens(piece)
+
+def chunk_sections(sections, budget=1500, max_chunks=12):
+    """Pack consecutive slides into (text, estimated tokens) chunks of about budget tokens each"""
+    # Returns (chunks to analyse, number of chunks the whole document would need)
+    chunks = []
+    current, current_tokens = [], 0
+    for piece, tokens in _pieces(sections, budget):
+        if current and current_tokens + tokens > budget:
+            chunks.append(("\n\n".join(current), current_tokens))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(("\n\n".join(current), current_tokens))
+
+    # Beyond max_chunks an evenly spaced sample still spans the whole document at a bounded cost
+    total_chunks = len(chunks)
+    if total_chunks > max_chunks:
+        chunks = [chunks[index * total_chunks // max_chunks] for index in range(max_chunks)]
+    return chunks, total_chunks
+
+def _unique(items, limit=None):
+    merged = list(dict.fromkeys(items))
+    return merged[:limit] if limit else merged
+
+def reduce_chunk_analyses(analyses, weights, total_chunks=None):
+    """Merge per-chunk analyses into one result, weighting CLO scores and confidences by chunk tokens"""
+    # Keywords and recommendations are merged; each CLO keeps the insights of its best-scoring chunk
+    total_weight = sum(weights) or 1
+    content_analysis = {}
+    for clo_code in analyses[0]['content_analysis']:
+        per_chunk = [analysis['content_analysis'][clo_code] for analysis in analyses]
+        scores = [float(clo['score']) for clo in per_chunk]
+        best = per_chunk[max(range(len(scores)), key=scores.__getitem__)]
+        content_analysis[clo_code] = {
+            'score': round(sum(score * weight for score, weight in zip(scores, weights)) / total_weight, 1),
+            'confidence': round(sum(float(clo['confidence']) * weight
+                                    for clo, weight in zip(per_chunk, weights)) / total_weight, 3),
+            'found_keywords': _unique(keyword for clo in per_chunk for keyword in clo['found_keywords']),
+            'ai_insights': best['ai_insights']
+        }
+
+    usage = {field: sum(analysis['usage'][field] for analysis in analyses)
+             for field in ('prompt_tokens', 'completion_tokens', 'total_tokens')}
+    return dict(
+        analyses[0],
+        content_analysis=content_analysis,
+        recommendations=_unique((rec for analysis in analyses for rec in analysis['recommendations']), 5),
+        usage=usage,
+        chunks={'analyzed': len(analyses), 'total': total_chunks or len(analyses)}
+    )
@@ -0,0 +1,143 @@
+import codecs
+import io
+import re
+from html.parser import HTMLParser
+
+READ_SIZE = 64 * 1024
+
+MD_HEADING = re.compile(r'^#{1,2}\s')
+MD_FENCE = re.compile(r'^\s*(```|~~~)')
+MD_IMAGE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+MD_LINK = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+MD_PREFIX = re.compile(r'^\s*(#{1,6}\s+|>\s*|[-*+]\s+|\d+[.)]\s+)+')
+MD_EMPHASIS = re.compile(r'(\*\*|__|\*|`)')
+MD_TAG = re.compile(r'<[^>]+>')
+
+HTML_CHARSET = re.compile(rb'charset\s*=\s*["\']?([\w-]+)', re.IGNORECASE)
+
+def _text_stream(file, encoding='utf-8'):
+    """Decode a binary file object incrementally"""
+    file.seek(0)
+    if isinstance(file, io.RawIOBase):
+        file = io.BufferedReader(file, READ_SIZE)
+    return io.TextIOWrapper(file, encoding=encoding, errors='replace', newline=None)
+
+class MarkdownExtractor:
+    """Split Markdown into sections at #/## headings and '---' slide breaks (Marp/reveal.js)"""
+
+    def iter_sections(self, file):
+        """Yield plain text per section, reading the file line by line"""
+        stream = _text_stream(file)
+        try:
+            lines = []
+            in_fence = False
+            in_front_matter = False
+            previous_blank = True
+
+            for number, line in enumerate(stream):
+                line = line.rstrip("\n")
+                if number == 0 and line.strip() == "---":
+                    in_front_matter = True
+                    continue
+                if in_front_matter:
+                    in_front_matter = line.strip() not in ("---", "...")
+                    continue
+
+                if MD_FENCE.match(line):
+                    in_fence = not in_fence
+                    continue
+
+                is_break = not in_fence and previous_blank and line.strip() == "---"
+                is_heading = not in_fence and bool(MD_HEADING.match(line))
+                if (is_break or is_heading) and any(lines):
+                    yield "\n".join(lines).strip()
+                    lines = []
+
+                previous_blank = not line.strip()
+                if not is_break:
+                    lines.append(line if in_fence else self._plain(line))
+
+            if any(lines):
+                yield "\n".join(lines).strip()
+        finally:
+            stream.detach()
+
+    def _plain(self, line):
+        """Strip Markdown syntax from one line, keeping link and image text"""
+        line = MD_IMAGE.sub(r'\1', line)
+        line = MD_LINK.sub(r'\1', line)
+        line = MD_PREFIX.sub('', line)
+        line = MD_TAG.sub('', line)
+        return MD_EMPHASIS.sub('', line).strip()
+
+class _SectionParser(HTMLParser):
+    """Collect visible text, closing a section at each h1/h2, <section> and <hr>"""
+
+    SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+    BLOCK_TAGS = {'p', 'div', 'li', 'tr', 'br', 'h3', 'h4', 'h5', 'h6', 'td', 'th',
+                  'blockquote', 'pre', 'ul', 'ol', 'table', 'article', 'title'}
+    SECTION_TAGS = {'h1', 'h2', 'section', 'hr'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections = []
+        self._parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.SECTION_TAGS:
+            self.close_section()
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS or tag in self.SECTION_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def close_section(self):
+        lines = (" ".join(line.split()) for line in "".join(self._parts).splitlines())
+        text = "\n".join(line for line in lines if line)
+        if text:
+            self.sections.append(text)
+        self._parts = []
+
+class HTMLExtractor:
+    """Extract visible HTML text, one section per h1/h2 or <section>"""
+
+    def iter_sections(self, file):
+        """Feed the parser in fixed-size chunks and yield sections as soon as they close"""
+        stream = _text_stream(file, self._sniff_encoding(file))
+        parser = _SectionParser()
+        try:
+            while True:
+                chunk = stream.read(READ_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                yield from parser.sections
+                parser.sections = []
+
+            parser.close()
+            parser.close_section()
+            yield from parser.sections
+        finally:
+            stream.detach()
+
+    def _sniff_encoding(self, file):
+        """Use a declared <meta charset> (e.g. tis-620 pages), defaulting to UTF-8"""
+        file.seek(0)
+        match = HTML_CHARSET.search(file.read(4096))
+        if match:
+            try:
+                return codecs.lookup(match.group(1).decode('ascii')).name
+            except (LookupError, UnicodeDecodeError):
+                pass
+        return 'utf-8'
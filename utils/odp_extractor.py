@@ -0,0 +1,74 @@
+import zipfile
+import xml.etree.ElementTree as ET
+
+from utils.pptx_extractor import SlideText
+
+NS_DRAW = '{urn:oasis:names:tc:opendocument:xmlns:drawing:1.0}'
+NS_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+NS_PRESENTATION = '{urn:oasis:names:tc:opendocument:xmlns:presentation:1.0}'
+
+class ODPExtractor:
+    """Extract slide text and speaker notes from an OpenDocument presentation"""
+
+    def iter_slides(self, file):
+        """Yield one SlideText per draw:page, streaming content.xml"""
+        if not zipfile.is_zipfile(file):
+            raise Exception("ไม่สามารถอ่านไฟล์ OpenDocument: รองรับเฉพาะไฟล์ .odp")
+        file.seek(0)
+
+        try:
+            with zipfile.ZipFile(file) as archive:
+                with archive.open('content.xml') as stream:
+                    yield from self._iter_pages(stream)
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise Exception(f"ไม่สามารถอ่านไฟล์ OpenDocument: {str(e)}")
+
+    def iter_sections(self, file):
+        """Yield each slide's text followed by its notes"""
+        for slide in self.iter_slides(file):
+            yield f"{slide.text}\n{slide.notes}" if slide.notes else slide.text
+
+    def _iter_pages(self, stream):
+        number = 0
+        in_notes = False
+        paragraphs = []
+        notes = []
+
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == f'{NS_PRESENTATION}notes':
+                    in_notes = True
+                continue
+
+            if tag in (f'{NS_TEXT}p', f'{NS_TEXT}h'):
+                paragraph = _paragraph_text(elem).strip()
+                if paragraph:
+                    (notes if in_notes else paragraphs).append(paragraph)
+                # Keep the tail: it belongs to the parent element
+                tail = elem.tail
+                elem.clear()
+                elem.tail = tail
+            elif tag == f'{NS_PRESENTATION}notes':
+                in_notes = False
+            elif tag == f'{NS_DRAW}page':
+                number += 1
+                yield SlideText(number, "\n".join(paragraphs), "\n".join(notes))
+                paragraphs = []
+                notes = []
+                elem.clear()
+
+def _paragraph_text(elem):
+    """Text of a text:p/text:h, expanding ODF space, tab and line-break elements"""
+    parts = [elem.text or ""]
+    for child in elem:
+        if child.tag == f'{NS_TEXT}s':
+            parts.append(" " * int(child.get(f'{NS_TEXT}c', '1')))
+        elif child.tag == f'{NS_TEXT}tab':
+            parts.append("\t")
+        elif child.tag == f'{NS_TEXT}line-break':
+            parts.append("\n")
+        elif child.tag not in (f'{NS_TEXT}p', f'{NS_TEXT}h'):
+            parts.append(_paragraph_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
@@ -0,0 +1,123 @@
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+NS_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+NS_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+NS_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+NOTES_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide'
+
+SlideText = namedtuple('SlideText', ['number', 'text', 'notes'])
+
+class PPTXExtractor:
+    """Extract slide text and speaker notes directly from the OOXML zip"""
+
+    def iter_slides(self, file):
+        """Yield one SlideText per slide in presentation order"""
+        if not zipfile.is_zipfile(file):
+            raise Exception("ไม่สามารถอ่านไฟล์ PowerPoint: รองรับเฉพาะไฟล์ .pptx")
+        file.seek(0)
+
+        try:
+            with zipfile.ZipFile(file) as archive:
+                names = set(archive.namelist())
+                for number, slide_path in enumerate(self._slide_order(archive, names), 1):
+                    with archive.open(slide_path) as stream:
+                        text = "\n".join(self._iter_paragraphs(stream))
+
+                    notes = ""
+                    notes_path = self._notes_path(archive, names, slide_path)
+                    if notes_path:
+                        with archive.open(notes_path) as stream:
+                            notes = "\n".join(self._iter_paragraphs(stream, body_only=True))
+
+                    yield SlideText(number, text, notes)
+        except zipfile.BadZipFile as e:
+            raise Exception(f"ไม่สามารถอ่านไฟล์ PowerPoint: {str(e)}")
+
+    def iter_sections(self, file):
+        """Yield each slide's text followed by its speaker notes"""
+        for slide in self.iter_slides(file):
+            yield f"{slide.text}\n{slide.notes}" if slide.notes else slide.text
+
+    def _slide_order(self, archive, names):
+        """Resolve slide part names in the order listed by presentation.xml"""
+        rel_targets = self._relationships(archive, names, 'ppt/presentation.xml')
+        ordered = []
+        if 'ppt/presentation.xml' in names:
+            with archive.open('ppt/presentation.xml') as stream:
+                for _, elem in ET.iterparse(stream):
+                    if elem.tag == f'{NS_P}sldId':
+                        target = rel_targets.get(elem.get(f'{NS_R}id'))
+                        if target in names:
+                            ordered.append(target)
+                    elif elem.tag == f'{NS_P}sldIdLst':
+                        break
+
+        if ordered:
+            return ordered
+
+        # Fallback for decks without a usable slide list: numeric file order
+        slide_paths = [name for name in names if re.fullmatch(r'ppt/slides/slide\d+\.xml', name)]
+        return sorted(slide_paths, key=lambda name: int(re.search(r'(\d+)\.xml$', name).group(1)))
+
+    def _notes_path(self, archive, names, slide_path):
+        """Find the notes slide linked from a slide, if any"""
+        targets = self._relationships(archive, names, slide_path, rel_type=NOTES_REL_TYPE)
+        for target in targets.values():
+            if target in names:
+                return target
+        return None
+
+    def _relationships(self, archive, names, part_path, rel_type=None):
+        """Map relationship ids to absolute part names for one part"""
+        part_dir, part_name = posixpath.split(part_path)
+        rels_path = posixpath.join(part_dir, '_rels', f'{part_name}.rels')
+        if rels_path not in names:
+            return {}
+
+        targets = {}
+        with archive.open(rels_path) as stream:
+            for _, elem in ET.iterparse(stream):
+                if elem.tag == f'{NS_PKG_REL}Relationship' and (rel_type is None or elem.get('Type') == rel_type):
+                    target = elem.get('Target', '')
+                    if target.startswith('/'):
+                        target = target[1:]
+                    else:
+                        target = posixpath.normpath(posixpath.join(part_dir, target))
+                    targets[elem.get('Id')] = target
+                elem.clear()
+        return targets
+
+    def _iter_paragraphs(self, stream, body_only=False):
+        """Stream paragraph text from a slide part, clearing parsed elements"""
+        in_body = not body_only
+        in_field = False
+        runs = []
+
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == f'{NS_A}fld':
+                    in_field = True
+                continue
+
+            if tag == f'{NS_P}ph' and body_only:
+                in_body = elem.get('type') == 'body'
+            elif tag == f'{NS_A}fld':
+                in_field = False
+            elif tag == f'{NS_A}t':
+                if in_body and not in_field and elem.text:
+                    runs.append(elem.text)
+            elif tag == f'{NS_A}p':
+                paragraph = "".join(runs).strip()
+                runs = []
+                if paragraph:
+                    yield paragraph
+                elem.clear()
+            elif tag == f'{NS_P}sp':
+                in_body = not body_only
+                elem.clear()
@@ -0,0 +1,159 @@
+import os
+import re
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from utils.stable_hash import stable_digest
+
+SEMANTIC_MODEL_VERSION = "1"
+
+_HASH_MULTIPLIER = np.uint64(1000003)
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+def _normalize(text):
+    """Lowercase and collapse punctuation/whitespace runs to one space"""
+    return re.sub(r'[^\w]+', ' ', text.lower()).strip()
+
+def hashed_ngram_counts(text, dims, ngram_range=(2, 4)):
+    """Counts of character n-grams hashed into dims buckets (a stable polynomial hash, not hash())"""
+    counts = np.zeros(dims, dtype=np.float64)
+    text = _normalize(text)
+    if not text:
+        return counts
+
+    codes = np.frombuffer(f" {text} ".encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        if len(codes) < n:
+            break
+        # Rolling over all n-grams at once: h = ((c0 * M + c1) * M + c2) ... per window
+        window_hash = np.full(len(codes) - n + 1, np.uint64(n))
+        for offset in range(n):
+            window_hash = (window_hash * _HASH_MULTIPLIER + codes[offset:len(codes) - n + 1 + offset]) & _MASK_32
+        counts += np.bincount((window_hash % np.uint64(dims)).astype(np.int64), minlength=dims)
+    return counts
+
+def _l2_normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+class SemanticModel:
+    """LSA projection of hashed character n-grams with precomputed CLO/YLO description vectors"""
+
+    def __init__(self, dims, ngram_range, idf, components, clo_codes, clo_vectors, ylo_codes, ylo_vectors):
+        self.dims = dims
+        self.ngram_range = ngram_range
+        self.idf = idf
+        self.components = components  # rank x dims, rows of Vt from the SVD
+        self.clo_codes = clo_codes    # course code -> CLO codes, aligned with clo_vectors rows
+        self.clo_vectors = clo_vectors
+        self.ylo_codes = ylo_codes
+        self.ylo_vectors = ylo_vectors
+
+    def _weighted(self, text):
+        counts = hashed_ngram_counts(text, self.dims, self.ngram_range)
+        return _l2_normalize(np.log1p(counts) * self.idf)
+
+    def embed(self, text):
+        """Latent vector of a text: one hashing pass and one projection"""
+        # Not renormalised - its length (at most 1) is the share of the text inside the program's
+        # subspace, so off-topic text stays near zero similarity instead of being scaled up
+        return self.components @ self._weighted(text)
+
+    def clo_similarity(self, course_code, vector):
+        """Similarity of an embedded document to each CLO of a course (cosine x in-subspace share)"""
+        return dict(zip(self.clo_codes[course_code], (self.clo_vectors[course_code] @ vector).tolist()))
+
+    def ylo_similarity(self, vector):
+        return dict(zip(self.ylo_codes, (self.ylo_vectors @ vector).tolist()))
+
+    def save(self, path):
+        """Write the model as one .npz, atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            'dims': np.array(self.dims), 'ngram_range': np.array(self.ngram_range),
+            'idf': self.idf, 'components': self.components,
+            'ylo_codes': np.array(self.ylo_codes), 'ylo_vectors': self.ylo_vectors,
+            'course_codes': np.array(list(self.clo_codes))
+        }
+        for course_code, codes in self.clo_codes.items():
+            arrays[f'clo_codes:{course_code}'] = np.array(codes)
+            arrays[f'clo_vectors:{course_code}'] = self.clo_vectors[course_code]
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                np.savez(tmp_file, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            course_codes = data['course_codes'].tolist()
+            return cls(
+                int(data['dims']), tuple(data['ngram_range'].tolist()),
+                data['idf'], data['components'],
+                {code: data[f'clo_codes:{code}'].tolist() for code in course_codes},
+                {code: data[f'clo_vectors:{code}'] for code in course_codes},
+                data['ylo_codes'].tolist(), data['ylo_vectors']
+            )
+
+def _program_corpus(course_descriptions, ylo_structure, plos):
+    """Fitting texts: course descriptions, CLOs with their keywords, PLOs and YLOs"""
+    corpus = {}
+    for course_code, course_data in course_descriptions.items():
+        corpus[f"course:{course_code}"] = f"{course_data['name']} {course_data.get('description', '')}"
+        for clo_code, clo_description in course_data['clo'].items():
+            keywords = " ".join(course_data['keywords'].get(clo_code, []))
+            corpus[f"clo:{course_code}:{clo_code}"] = f"{clo_description} {keywords}"
+    for plo_code, plo_data in plos.items():
+        corpus[f"plo:{plo_code}"] = plo_data['description']
+    for ylo_code, ylo_data in ylo_structure.items():
+        corpus[f"ylo:{ylo_code}"] = ylo_data['description']
+    return corpus
+
+def fit_semantic_model(course_descriptions, ylo_structure, plos, dims=2 ** 14, ngram_range=(2, 4), rank=64):
+    """Fit idf weights and a truncated SVD (LSA) on the program's own texts"""
+    corpus = _program_corpus(course_descriptions, ylo_structure, plos)
+    counts = np.stack([hashed_ngram_counts(text, dims, ngram_range) for text in corpus.values()])
+
+    document_frequency = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(counts)) / (1 + document_frequency)) + 1
+    weighted = _l2_normalize(np.log1p(counts) * idf)
+
+    _, singular_values, vt = np.linalg.svd(weighted, full_matrices=False)
+    rank = min(rank, int((singular_values > 1e-10).sum()))
+    model = SemanticModel(dims, ngram_range, idf, vt[:rank], {}, {}, [], np.zeros((0, rank)))
+
+    for course_code, course_data in course_descriptions.items():
+        model.clo_codes[course_code] = list(course_data['clo'])
+        model.clo_vectors[course_code] = _l2_normalize(np.stack(
+            [model.embed(corpus[f"clo:{course_code}:{clo_code}"]) for clo_code in course_data['clo']]
+        ))
+    model.ylo_codes = list(ylo_structure)
+    model.ylo_vectors = _l2_normalize(np.stack(
+        [model.embed(corpus[f"ylo:{ylo_code}"]) for ylo_code in ylo_structure]
+    ))
+    return model
+
+def load_or_fit_semantic_model(cache_dir, course_descriptions, ylo_structure, plos, **options):
+    """Reuse the persisted model for this exact configuration, fitting and saving it on first use"""
+    corpus = _program_corpus(course_descriptions, ylo_structure, plos)
+    fingerprint = stable_digest(SEMANTIC_MODEL_VERSION, options, corpus, purpose="semantic-model", digest_size=8)
+    path = Path(cache_dir) / f"lsa-{fingerprint}.npz"
+
+    try:
+        return SemanticModel.load(path)
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        # Missing, truncated, corrupt or written by an older numpy; refit below
+        pass
+
+    model = fit_semantic_model(course_descriptions, ylo_structure, plos, **options)
+    model.save(path)
+    return model
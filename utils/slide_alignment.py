@@ -0,0 +1,67 @@
+import numpy as np
+
+from utils.batch_scoring import incidence_matrices, keyword_totals, round_like_python, rule_based_clo_scores
+
+class SlideAlignment:
+    """Per-slide CLO keyword hits for one course, with prefix sums for constant-time slide ranges"""
+
+    def __init__(self, clo_codes, prefix_counts, keyword_incidence, term_incidence, totals):
+        self.clo_codes = clo_codes
+        # prefix_counts[s, k]: hits of the course's k-th pattern in slides [0, s)
+        self.prefix_counts = prefix_counts
+        self.keyword_incidence = keyword_incidence
+        self.term_incidence = term_incidence
+        self.totals = totals
+
+    @property
+    def slide_count(self):
+        return len(self.prefix_counts) - 1
+
+    def slide_hits(self):
+        """Slides x CLOs: distinct keywords of each CLO found on each slide"""
+        per_slide = np.diff(self.prefix_counts, axis=0)
+        return (per_slide > 0).astype(np.int64) @ self.keyword_incidence
+
+    def slide_coverage(self):
+        """Slides x CLOs keyword coverage (0-1) of each slide on its own"""
+        return self.slide_hits() / np.maximum(self.totals, 1)
+
+    def range_counts(self, start_slide=0, stop_slide=None):
+        """Pattern hits within slides [start_slide, stop_slide) from two prefix rows"""
+        stop_slide = self.slide_count if stop_slide is None else min(stop_slide, self.slide_count)
+        start_slide = min(max(0, start_slide), stop_slide)
+        return self.prefix_counts[stop_slide] - self.prefix_counts[start_slide]
+
+    def range_scores(self, start_slide=0, stop_slide=None):
+        """Rule-based CLO scores and keyword coverage for a slide range (e.g. one lecture section)"""
+        presence = (self.range_counts(start_slide, stop_slide) > 0).astype(np.int64)
+        coverage, scores = rule_based_clo_scores(
+            presence @ self.keyword_incidence, presence @ self.term_incidence, self.totals
+        )
+        return round_like_python(scores, 1), coverage
+
+def build_slide_alignment(course, hits, slide_offsets):
+    """Bucket a document's pattern hits by slide in one pass and accumulate prefix sums"""
+    pattern_count = len(hits.lengths)
+    keyword_incidence, term_incidence = incidence_matrices(course, pattern_count)
+
+    # Only the patterns this course uses become columns
+    columns = np.flatnonzero(keyword_incidence.any(axis=1) | term_incidence.any(axis=1))
+    slide_count = len(slide_offsets) - 1
+    counts = np.zeros((slide_count + 1, len(columns)), dtype=np.int64)
+
+    # find_course_terms restarts the scan at every slide, so each hit lies wholly on the slide it starts on
+    boundaries = np.asarray(slide_offsets, dtype=np.int64)
+    for column, pattern_id in enumerate(columns):
+        positions = hits.positions[pattern_id]
+        if positions:
+            slides = np.searchsorted(boundaries, positions, side='right') - 1
+            np.add.at(counts[1:, column], slides, 1)
+
+    return SlideAlignment(
+        [clo.code for clo in course.clos],
+        np.cumsum(counts, axis=0),
+        keyword_incidence[columns],
+        term_incidence[columns],
+        keyword_totals(course)
+    )
@@ -0,0 +1,12 @@
+import sqlite3
+from pathlib import Path
+
+def connect_shared(db_path, schema=()):
+    """Autocommit WAL connection that any thread may use; callers serialise access with their own lock"""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    for statement in schema:
+        db.execute(statement)
+    return db
@@ -0,0 +1,34 @@
+import hashlib
+import json
+
+# Unlike hash(), these digests are identical in every process, replica and restart, so they can
+# seed deterministic scoring and key caches shared between workers
+
+DEFAULT_KEY = b"plo-assessment"
+
+def _canonical_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=canonical_json)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'bytes': bytes(value).hex()}
+    if hasattr(value, 'tolist'):  # numpy arrays and scalars, array.array
+        return value.tolist()
+    if hasattr(value, '_asdict'):
+        return value._asdict()
+    raise TypeError(f"cannot canonicalise {type(value).__name__}")
+
+def canonical_json(value):
+    """One fixed serialisation per value: sorted keys, no whitespace, tuples as lists, UTF-8 text"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False,
+                      default=_canonical_default)
+
+def stable_digest(*parts, purpose="", key=DEFAULT_KEY, digest_size=16):
+    """Keyed BLAKE2b hex digest of the canonicalised parts; purpose separates unrelated uses"""
+    hasher = hashlib.blake2b(key=key, digest_size=digest_size, person=purpose.encode()[:16])
+    hasher.update(canonical_json(parts).encode('utf-8'))
+    return hasher.hexdigest()
+
+def stable_seed(*parts, purpose="seed", key=DEFAULT_KEY, bits=32):
+    """Deterministic integer seed in [0, 2**bits) derived from the parts"""
+    digest = stable_digest(*parts, purpose=purpose, key=key, digest_size=8)
+    return int(digest, 16) % (2 ** bits)
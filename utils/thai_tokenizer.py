@@ -0,0 +1,216 @@
+import re
+from array import array
+
+# General Thai lexicon for the program's domain; course keywords are added on top
+GENERAL_LEXICON = [
+    # Function words
+    'ที่', 'มี', 'และ', 'ของ', 'ใน', 'การ', 'ความ', 'ต่อ', 'กับ', 'เป็น', 'ได้', 'ให้', 'จาก', 'โดย',
+    'เพื่อ', 'อย่าง', 'ระหว่าง', 'ซึ่ง', 'หรือ', 'แต่', 'ก็', 'จะ', 'ไม่', 'นี้', 'นั้น', 'ทาง', 'ด้าน',
+    'ระดับ', 'ตาม', 'ภายใต้', 'ทั้ง', 'แบบ', 'เช่น', 'รวมถึง', 'ตลอดจน', 'สามารถ', 'เกี่ยวข้อง', 'ต่างๆ',
+    'อื่นๆ', 'หลาย', 'ทุก', 'แต่ละ', 'เมื่อ', 'ถ้า', 'หาก', 'ว่า', 'คือ', 'ยัง', 'อยู่', 'ไป', 'มา', 'แล้ว',
+    'ทำ', 'ใช้', 'เน้น', 'ด้วย', 'เพราะ', 'จึง', 'ดังนั้น', 'ขึ้น', 'ลง', 'ต้อง', 'ควร', 'อาจ', 'ปัจจุบัน',
+    'ทำให้', 'บท', 'บทที่', 'หัวข้อ', 'เนื้อหา', 'บทเรียน', 'วัตถุประสงค์', 'สรุป', 'ตัวอย่าง', 'กรณีศึกษา',
+    # Learning outcome verbs
+    'อธิบาย', 'วิเคราะห์', 'อภิปราย', 'ประยุกต์', 'ประยุกต์ใช้', 'เสนอ', 'ประเมิน', 'ออกแบบ', 'สืบค้น',
+    'สังเคราะห์', 'เลือก', 'เลือกใช้', 'ปฏิบัติ', 'สื่อสาร', 'สร้าง', 'พัฒนา', 'ศึกษา', 'เข้าใจ', 'วางแผน',
+    'ถ่ายทอด', 'นำเสนอ', 'เขียน', 'อ่าน', 'แก้ไข', 'แก้ปัญหา', 'ดำเนินการ', 'บูรณาการ', 'จัดการ', 'ติดตาม',
+    'ตรวจวัด', 'ทบทวน', 'ปรับตัว', 'ลด', 'เพิ่ม', 'รักษา', 'ป้องกัน', 'คาดการณ์', 'เปรียบเทียบ', 'สาธิต',
+    # Environment and climate
+    'สิ่งแวดล้อม', 'ภูมิอากาศ', 'สภาพภูมิอากาศ', 'การเปลี่ยนแปลง', 'เปลี่ยนแปลง', 'สภาพ', 'ระบบ', 'โลก',
+    'ปัจจัย', 'พลวัต', 'ผล', 'ผลกระทบ', 'ระบบนิเวศ', 'นิเวศ', 'ความหลากหลาย', 'หลากหลาย', 'ชีวภาพ',
+    'ความหลากหลายทางชีวภาพ', 'ทางบก', 'ป่าไม้', 'ป่า', 'ดิน', 'ทรัพยากร', 'ทรัพยากรดิน', 'ทรัพยากรน้ำ',
+    'น้ำ', 'ลุ่มน้ำ', 'ฝน', 'อุณหภูมิ', 'ก๊าซ', 'เรือนกระจก', 'ก๊าซเรือนกระจก', 'คาร์บอน', 'กักเก็บ',
+    'พลังงาน', 'พลังงานสะอาด', 'สะอาด', 'อาคาร', 'สีเขียว', 'อาคารสีเขียว', 'เกษตร', 'การเกษตร', 'มลพิษ',
+    'อากาศ', 'บรรยากาศ', 'ภัยแล้ง', 'น้ำท่วม', 'อนุรักษ์', 'ฟื้นฟู', 'ยั่งยืน', 'อย่างยั่งยืน', 'การพัฒนา',
+    'ใช้น้ำ', 'จัดหาน้ำ', 'สถานการณ์', 'ปัญหา', 'บริบท', 'ความสัมพันธ์', 'สัมพันธ์', 'แนวทาง', 'แผน',
+    'บริหาร', 'บริหารจัดการ', 'การจัดการ', 'นโยบาย', 'กลไก', 'เศรษฐศาสตร์', 'เศรษฐกิจ', 'บทบาท',
+    # Technology
+    'เทคโนโลยี', 'เครื่องมือ', 'ภูมิสารสนเทศ', 'สารสนเทศ', 'ภูมิศาสตร์', 'ระบบสารสนเทศภูมิศาสตร์',
+    'การรับรู้ระยะไกล', 'แบบจำลอง', 'จำลอง', 'ข้อมูล', 'ดิจิทัล', 'นวัตกรรม', 'คอมพิวเตอร์',
+    'ปัญญาประดิษฐ์',
+    # Community and society
+    'สังคม', 'ชุมชน', 'มีส่วนร่วม', 'การมีส่วนร่วม', 'ส่วนร่วม', 'ผู้มีส่วนได้ส่วนเสีย', 'ประชาชน',
+    'ท้องถิ่น', 'ภูมิภาค', 'ประเทศ', 'นานาชาติ', 'ความร่วมมือ', 'กรอบความร่วมมือ', 'กรอบ', 'ร่วมมือ',
+    # Research
+    'วิจัย', 'งานวิจัย', 'การวิจัย', 'ระเบียบวิธี', 'ระเบียบวิธีวิจัย', 'วิธีการ', 'หลัก', 'โครงร่าง',
+    'วรรณกรรม', 'สถิติ', 'ทางสถิติ', 'จรรยาบรรณ', 'จริยธรรม', 'โจทย์', 'โจทย์วิจัย', 'ก่อนหน้า', 'งาน',
+    'เหมาะสม', 'อย่างเหมาะสม', 'เป็นระบบ', 'อย่างเป็นระบบ', 'ทำวิจัย', 'บทความ', 'วิชาการ', 'ผลการวิจัย',
+    'สมมติฐาน', 'ตัวแปร', 'กลุ่มตัวอย่าง', 'แบบสอบถาม', 'สัมภาษณ์', 'ผู้เรียน', 'นิสิต', 'นักศึกษา',
+]
+
+STOPWORDS = {
+    'ที่', 'มี', 'และ', 'ของ', 'ใน', 'การ', 'ความ', 'ต่อ', 'กับ', 'เป็น', 'ได้', 'ให้', 'จาก', 'โดย',
+    'เพื่อ', 'อย่าง', 'ระหว่าง', 'ซึ่ง', 'หรือ', 'แต่', 'ก็', 'จะ', 'ไม่', 'นี้', 'นั้น', 'ทาง', 'ด้าน',
+    'ระดับ', 'ตาม', 'ภายใต้', 'ทั้ง', 'แบบ', 'เช่น', 'สามารถ', 'ใช้', 'ทำ', 'ว่า', 'คือ',
+    'the', 'and', 'of', 'to', 'in', 'for', 'a', 'an', 'with', 'on', 'by', 'is', 'are', 'or', 'as', 'at',
+}
+
+def is_content_term(token):
+    """Tokens worth matching on their own: not a stopword and longer than one character"""
+    return token not in STOPWORDS and len(token) > 1
+
+_RUN_PATTERN = re.compile(r'([a-z0-9]+)|([ก-๎]+)')
+_LEADING_VOWELS = set('เแโใไ')
+# Marks and following vowels that always attach to the preceding consonant
+_ATTACHED = set('ะัาำิีึืฺุู็่้๊๋์ํ๎')
+
+class TokenStream:
+    """Tokens for a whole Document plus the token index where each slide starts"""
+    __slots__ = ('tokens', 'slide_offsets')
+
+    def __init__(self, tokens, slide_offsets):
+        self.tokens = tokens
+        self.slide_offsets = slide_offsets  # array('I'), len(slides) + 1 entries
+
+    def token_bounds(self, start_slide=0, stop_slide=None):
+        """Token span [start, end) covering slides start_slide .. stop_slide - 1"""
+        slide_count = len(self.slide_offsets) - 1
+        stop_slide = slide_count if stop_slide is None else min(stop_slide, slide_count)
+        start_slide = max(0, start_slide)
+        if start_slide >= stop_slide:
+            return 0, 0
+        return self.slide_offsets[start_slide], self.slide_offsets[stop_slide]
+
+class ThaiEnglishTokenizer:
+    """Dictionary-trie tokenizer: maximal matching for Thai runs, word runs for Latin text"""
+
+    def __init__(self, lexicon=GENERAL_LEXICON, keywords=()):
+        # Compiled trie: one child dict per node plus its word-end weight
+        # (None = not a word end, 0 = lexicon word, n = keyword covering n chars)
+        self._children = [{}]
+        self._word_weight = [None]
+        self._max_word_length = 0
+        for word in lexicon:
+            self.add_word(word)
+        for keyword in keywords:
+            self.add_word(keyword, is_keyword=True)
+
+    def add_word(self, word, is_keyword=False):
+        """Insert every Thai run of a word/phrase into the trie"""
+        for match in _RUN_PATTERN.finditer(word.lower()):
+            thai_run = match.group(2)
+            if not thai_run:
+                continue
+            node = 0
+            for char in thai_run:
+                child = self._children[node].get(char)
+                if child is None:
+                    child = len(self._children)
+                    self._children[node][char] = child
+                    self._children.append({})
+                    self._word_weight.append(None)
+                node = child
+            weight = len(thai_run) if is_keyword else 0
+            self._word_weight[node] = max(self._word_weight[node] or 0, weight)
+            self._max_word_length = max(self._max_word_length, len(thai_run))
+
+    def tokenize(self, text):
+        """Lower-case Latin words and dictionary-segmented Thai words, in one pass"""
+        tokens = []
+        for match in _RUN_PATTERN.finditer(text.lower()):
+            latin_run, thai_run = match.groups()
+            if latin_run:
+                tokens.append(self._normalize_latin(latin_run))
+            else:
+                tokens.extend(self._segment_thai(thai_run))
+        return tokens
+
+    def tokenize_document(self, document):
+        """Tokenize each slide of a Document into a single TokenStream"""
+        tokens = []
+        slide_offsets = array('I', [0])
+        for slide in document:
+            tokens.extend(self.tokenize(slide.text))
+            slide_offsets.append(len(tokens))
+        return TokenStream(tokens, slide_offsets)
+
+    def content_terms(self, text):
+        """Distinct non-stopword tokens, e.g. the terms of a CLO description"""
+        return [token for token in dict.fromkeys(self.tokenize(text)) if is_content_term(token)]
+
+    @staticmethod
+    def _normalize_latin(word):
+        # Light plural folding so 'tools' matches 'tool' and 'dynamics' matches 'dynamic'
+        if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+            return word[:-1]
+        return word
+
+    def _segment_thai(self, run):
+        """Segment a Thai run via dynamic programming over trie matches"""
+        # Preference: fewest unknown chars, then most chars covered by course keywords
+        # (so 'การมีส่วนร่วม' still yields the keyword 'มีส่วนร่วม'), then fewest tokens
+        n = len(run)
+        boundary = self._cluster_boundaries(run)
+        next_boundary = [n] * (n + 1)
+        following = n
+        for i in range(n - 1, -1, -1):
+            next_boundary[i] = following
+            if boundary[i]:
+                following = i
+
+        # cost = (unknown chars, -keyword chars, tokens); back[j] = (i, is_known)
+        best = [None] * (n + 1)
+        back = [None] * (n + 1)
+        best[0] = (0, 0, 0)
+        children, word_weights = self._children, self._word_weight
+
+        for i in range(n):
+            cost = best[i]
+            if cost is None or not boundary[i]:
+                continue
+            unknown, keyword_chars, count = cost
+
+            node = 0
+            for j in range(i, min(n, i + self._max_word_length)):
+                node = children[node].get(run[j])
+                if node is None:
+                    break
+                weight = word_weights[node]
+                if weight is not None and boundary[j + 1]:
+                    candidate = (unknown, keyword_chars - weight, count + 1)
+                    if best[j + 1] is None or candidate < best[j + 1]:
+                        best[j + 1] = candidate
+                        back[j + 1] = (i, True)
+
+            j = next_boundary[i]
+            candidate = (unknown + (j - i), keyword_chars, count + 1)
+            if best[j] is None or candidate < best[j]:
+                best[j] = candidate
+                back[j] = (i, False)
+
+        pieces = []
+        j = n
+        while j > 0:
+            i, known = back[j]
+            pieces.append((run[i:j], known))
+            j = i
+        pieces.reverse()
+
+        # Merge adjacent unknown clusters into a single token
+        tokens = []
+        previous_known = True
+        for piece, known in pieces:
+            if not known and not previous_known:
+                tokens[-1] += piece
+            else:
+                tokens.append(piece)
+            previous_known = known
+        return tokens
+
+    @staticmethod
+    def _cluster_boundaries(run):
+        """Positions where a word may start/end without splitting a character cluster"""
+        n = len(run)
+        boundary = [True] * (n + 1)
+        for i in range(1, n):
+            if run[i] in _ATTACHED or run[i - 1] in _LEADING_VOWELS:
+                boundary[i] = False
+        return boundary
+
+def build_course_tokenizer(course_descriptions):
+    """Tokenizer seeded with the general lexicon plus every course keyword"""
+    keywords = [keyword
+                for course in course_descriptions.values()
+                for clo_keywords in course.get('keywords', {}).values()
+                for keyword in clo_keywords]
+    return ThaiEnglishTokenizer(GENERAL_LEXICON, keywords)
@@ -0,0 +1,230 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import zipfile
+import zlib
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+
+# MIME types for archive members, matching what st.file_uploader reports for direct uploads
+MEMBER_TYPES = {
+    '.pdf': 'application/pdf',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.odp': 'application/vnd.oasis.opendocument.presentation',
+    '.md': 'text/markdown',
+    '.markdown': 'text/markdown',
+    '.html': 'text/html',
+    '.htm': 'text/html',
+    '.txt': 'text/plain'
+}
+
+class BufferStream(io.RawIOBase):
+    """Seekable read-only file object over a buffer (e.g. an mmap) without copying it"""
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        # Like BytesIO, a position past the end (PyPDF2 seeks there recovering bad xrefs) reads nothing
+        if self._pos >= len(self._view):
+            return 0
+        end = min(self._pos + len(target), len(self._view))
+        count = end - self._pos
+        target[:count] = self._view[self._pos:end]
+        self._pos = end
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+class IngestedUpload:
+    """An upload spooled once to disk, with size and SHA-256 from the same pass"""
+
+    def __init__(self, name, type, path, size, sha256):
+        self.name = name
+        self.type = type
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self._file = None
+        self._buffer = None
+
+    @property
+    def source(self):
+        """What the extraction worker reads: the spool file path"""
+        return self.path
+
+    def buffer(self):
+        """Read-only memory map of the spooled bytes"""
+        if self._buffer is None:
+            if self.size == 0:
+                return b""
+            self._file = open(self.path, 'rb')
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._buffer
+
+    def read_text(self, encoding='utf-8'):
+        """Decode the spooled bytes as text"""
+        return str(self.buffer()[:], encoding)
+
+    def close(self):
+        """Release the memory map and delete the spool file"""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        Path(self.path).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _iter_chunks(uploaded_file, chunk_size):
+    """Yield the upload's bytes in chunks without materialising a full copy"""
+    if hasattr(uploaded_file, 'getbuffer'):
+        # In-memory uploads (Streamlit's UploadedFile is a BytesIO): slice a memoryview
+        with uploaded_file.getbuffer() as view:
+            for start in range(0, len(view), chunk_size):
+                yield view[start:start + chunk_size]
+        return
+
+    uploaded_file.seek(0)
+    while True:
+        chunk = uploaded_file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def ingest_upload(uploaded_file, spool_dir=None, chunk_size=CHUNK_SIZE):
+    """Spool an upload to a temp file while computing its size and SHA-256"""
+    digest = hashlib.sha256()
+    size = 0
+    suffix = Path(uploaded_file.name).suffix
+    fd, path = tempfile.mkstemp(prefix='upload_', suffix=suffix, dir=spool_dir)
+    try:
+        with os.fdopen(fd, 'wb') as spool:
+            for chunk in _iter_chunks(uploaded_file, chunk_size):
+                digest.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+                if isinstance(chunk, memoryview):
+                    chunk.release()
+    except BaseException:
+        Path(path).unlink(missing_ok=True)
+        raise
+
+    return IngestedUpload(uploaded_file.name, uploaded_file.type, path, size, digest.hexdigest())
+
+class MemoryUpload:
+    """An upload held only in memory (e.g. an archive member), same interface as IngestedUpload"""
+
+    def __init__(self, name, type, data, sha256):
+        self.name = name
+        self.type = type
+        self.data = data
+        self.path = None
+        self.size = len(data)
+        self.sha256 = sha256
+
+    @property
+    def source(self):
+        """What the extraction worker reads: the bytes themselves"""
+        return self.data
+
+    def buffer(self):
+        return self.data
+
+    def read_text(self, encoding='utf-8'):
+        return str(self.data, encoding)
+
+    def close(self):
+        self.data = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class ArchiveMember:
+    """A supported file inside an uploaded .zip; nothing is decompressed until ingest()"""
+
+    def __init__(self, archive, info, archive_name):
+        self.archive = archive
+        self.info = info
+        self.name = f"{archive_name}/{_member_filename(info)}"
+        self.size = info.file_size
+        self.type = MEMBER_TYPES[Path(info.filename).suffix.lower()]
+
+    def ingest(self, max_bytes=None, chunk_size=CHUNK_SIZE):
+        """Decompress the member into memory while computing its SHA-256"""
+        if max_bytes is not None and self.size > max_bytes:
+            raise ValueError(f"ไฟล์ {self.name} มีขนาดเกิน {max_bytes // (1024 * 1024)} MB")
+
+        digest = hashlib.sha256()
+        data = bytearray()
+        try:
+            with self.archive.open(self.info) as member:
+                while True:
+                    chunk = member.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    data.extend(chunk)
+        except (zipfile.BadZipFile, zlib.error, EOFError, RuntimeError, NotImplementedError) as e:
+            raise ValueError(f"ไม่สามารถอ่าน {self.name} จากไฟล์ ZIP: {str(e)}")
+
+        return MemoryUpload(self.name, self.type, data, digest.hexdigest())
+
+def _member_filename(info):
+    """Member path as the author saw it (Thai Windows zips store cp874 names without the UTF-8 flag)"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    raw = info.filename.encode('cp437')
+    for encoding in ('utf-8', 'cp874'):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return info.filename
+
+def list_archive_members(uploaded_file):
+    """Supported files in an uploaded .zip, read from its central directory only"""
+    archive = zipfile.ZipFile(uploaded_file)
+    members = []
+    for info in sorted(archive.infolist(), key=lambda i: i.filename):
+        path = Path(info.filename)
+        if info.is_dir() or path.parts[0] == '__MACOSX' or path.name.startswith('.'):
+            continue
+        if path.suffix.lower() in MEMBER_TYPES:
+            members.append(ArchiveMember(archive, info, uploaded_file.name))
+    return members
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+from utils.sqlite_store import connect_shared
+
+# One AI call: a chat completion (or a response served from the cache, with no tokens spent)
+UsageRecord = namedtuple('UsageRecord', [
+    'course_code', 'assessor', 'model', 'content_hash',
+    'prompt_tokens', 'completion_tokens', 'latency_ms', 'cache_hit', 'succeeded'
+])
+
+GROUPINGS = {
+    'course': 'course_code',
+    'assessor': 'assessor',
+    'day': 'day',
+    'model': 'model'
+}
+
+def estimate_cost(pricing, model, prompt_tokens, completion_tokens):
+    """USD cost from per-million-token (input, output) prices; unknown models cost 0"""
+    input_price, output_price = pricing.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+class UsageLedger:
+    """Append-only SQLite log of AI calls with token, latency and cost roll-ups"""
+
+    def __init__(self, db_path, pricing):
+        self.db_path = Path(db_path)
+        self.pricing = pricing  # model -> (USD per 1M prompt tokens, USD per 1M completion tokens)
+        # Held for each batch so no other session's statement lands inside its transaction
+        self._lock = threading.Lock()
+        self._db = connect_shared(self.db_path, [
+            """
+            CREATE TABLE IF NOT EXISTS ai_calls (
+                id INTEGER PRIMARY KEY,
+                recorded_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                course_code TEXT NOT NULL,
+                assessor TEXT NOT NULL,
+                model TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                latency_ms REAL NOT NULL,
+                cache_hit INTEGER NOT NULL,
+                succeeded INTEGER NOT NULL,
+                cost_usd REAL NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ai_calls_day ON ai_calls (day)"
+        ])
+
+    def record(self, records):
+        """Append UsageRecords in one transaction, pricing each call at today's rates"""
+        # The cost is stored with the call so later price changes do not rewrite history
+        now = time.time()
+        day = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+        rows = [
+            (now, day, r.course_code, r.assessor, r.model, r.content_hash,
+             r.prompt_tokens, r.completion_tokens, r.latency_ms, int(r.cache_hit), int(r.succeeded),
+             estimate_cost(self.pricing, r.model, r.prompt_tokens, r.completion_tokens))
+            for r in records
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("""
+                    INSERT INTO ai_calls (recorded_at, day, course_code, assessor, model, content_hash,
+                                          prompt_tokens, completion_tokens, latency_ms, cache_hit, succeeded, cost_usd)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+            except BaseException:
+                # Leave the shared autocommit connection usable for the next BEGIN
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def summary(self, group_by='day', since=None):
+        """Requests, cache hits, API calls, failures, tokens, cost and mean API latency per course/assessor/day/model"""
+        column = GROUPINGS[group_by]
+        where, params = ("WHERE recorded_at >= ?", (since,)) if since is not None else ("", ())
+        with self._lock:
+            rows = self._db.execute(f"""
+                SELECT {column}, COUNT(*), SUM(cache_hit), SUM(1 - succeeded),
+                       SUM(prompt_tokens), SUM(completion_tokens), SUM(cost_usd),
+                       AVG(CASE WHEN cache_hit = 0 THEN latency_ms END)
+                FROM ai_calls {where}
+                GROUP BY {column}
+                ORDER BY {column} {'DESC' if group_by == 'day' else 'ASC'}
+            """, params).fetchall()
+        return [
+            {
+                group_by: key,
+                'requests': requests,
+                'cache_hits': cache_hits,
+                'api_calls': requests - cache_hits,
+                'failures': failures,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+                'cost_usd': cost,
+                'avg_latency_ms': latency or 0.0
+            }
+            for key, requests, cache_hits, failures, prompt_tokens, completion_tokens, cost, latency in rows
+        ]
+
+    def document_averages(self, model, course_code=None):
+        """Mean (API calls, prompt tokens, completion tokens) per analysed document, or None without history"""
+        # Only successful API calls count; cache hits and failures say nothing about a fresh analysis.
+        # One record() batch shares recorded_at, so each run of a deck is summed first and a deck
+        # analysed several times is averaged over its runs, counting once
+        where = "WHERE model = ? AND cache_hit = 0 AND succeeded = 1"
+        params = (model,)
+        if course_code is not None:
+            where += " AND course_code = ?"
+            params += (course_code,)
+        with self._lock:
+            row = self._db.execute(f"""
+                SELECT AVG(calls), AVG(prompt_tokens), AVG(completion_tokens) FROM (
+                    SELECT AVG(calls) AS calls, AVG(prompt_tokens) AS prompt_tokens,
+                           AVG(completion_tokens) AS completion_tokens
+                    FROM (
+                        SELECT content_hash, COUNT(*) AS calls, SUM(prompt_tokens) AS prompt_tokens,
+                               SUM(completion_tokens) AS completion_tokens
+                        FROM ai_calls {where}
+                        GROUP BY content_hash, course_code, recorded_at
+                    )
+                    GROUP BY content_hash
+                )
+            """, params).fetchone()
+        return None if row[0] is None else row